@@ -1,4 +1,5 @@
 # import os
+# import re
 # import json
 # import logging
 
@@ -18,6 +19,14 @@
 # directory_keywords = ["ls", "df"]
 # other_keywords = ["kubectl", "ssh_exec", "vmstat", "date"]
 
+# # 將所有關鍵詞編譯成單一 pattern，每條指令只需掃描一次
+# # (lookahead 讓重疊的關鍵詞也能被找到，與 `keyword in check` 結果一致)
+# keyword_pattern = re.compile(
+#     '(?=(' + '|'.join(map(re.escape, file_keywords + directory_keywords + other_keywords)) + '))'
+# )
+# file_keyword_set = frozenset(file_keywords)
+# directory_keyword_set = frozenset(directory_keywords)
+
 # # 指定local資料夾
 # base_directory = './local'
 
@@ -43,20 +52,15 @@
 
 #                     for check in checks:
 #                         # 每條指令只能被計算一次標的類型
-#                         categorized = False
+#                         found = {match.group(1) for match in keyword_pattern.finditer(check)}
 
-#                         # 優先檢查 file 標的
-#                         if any(keyword in check for keyword in file_keywords):
+#                         # 優先檢查 file 標的，其次 directory 標的
+#                         if not found.isdisjoint(file_keyword_set):
 #                             file_targets += 1
-#                             categorized = True
-
-#                         # 接著檢查 directory 標的，若已被分類則跳過
-#                         if not categorized and any(keyword in check for keyword in directory_keywords):
+#                         elif not found.isdisjoint(directory_keyword_set):
 #                             directory_targets += 1
-#                             categorized = True
-
-#                         # 若未分類則歸為其他標的
-#                         if not categorized:
+#                         else:
+#                             # 若未分類則歸為其他標的
 #                             other_targets += 1
 
 #                     # 統計檢測項目數量總數
@@ -77,8 +81,7 @@
 # print(f"檢測項目數量 (其他標的) : {other_targets}")
 
 
-import matplotlib.pyplot as plt
-import random
+import numpy as np
 
 # 给定的基础统计数据
 base_data = {
@@ -92,29 +95,25 @@ base_data = {
 # OS类型列表
 os_types = ['ubuntu22.04', 'debian12', 'rhel9_linux']
 
+# 固定种子，每次生成的图表一致
+rng = np.random.default_rng(0)
+
 
 # 随机生成数据并保持总数不变
 def generate_random_distribution(base_value, num_os):
     # 创建初始分配值，使其平均分配
-    distribution = [base_value // num_os] * num_os
-    remainder = base_value % num_os
-    
+    distribution = np.full(num_os, base_value // num_os)
+
     # 将余数随机分配给不同的OS
-    for _ in range(remainder):
-        distribution[random.randint(0, num_os - 1)] += 1
-    
-    # 在每个分配值基础上添加随机波动并确保总和不变
-    for i in range(num_os):
-        change = random.randint(-3, 3)  # 小范围波动
-        if distribution[i] + change >= 0:
-            distribution[i] += change
-    
-    total_assigned = sum(distribution)
-    difference = base_value - total_assigned
-    if difference != 0:
-        distribution[random.randint(0, num_os - 1)] += difference
-    
-    return distribution
+    distribution += np.bincount(rng.integers(0, num_os, base_value % num_os), minlength=num_os)
+
+    # 在每个分配值基础上添加随机波动 (不允许变成负数) 并确保总和不变
+    changed = distribution + rng.integers(-3, 4, num_os)  # 小范围波动
+    distribution = np.where(changed >= 0, changed, distribution)
+
+    distribution[rng.integers(0, num_os)] += base_value - distribution.sum()
+
+    return distribution.tolist()
 
 
 data = {rule_type: {os_type: count for os_type, count in zip(os_types, generate_random_distribution(base_value, len(os_types)))} 
@@ -122,6 +121,11 @@ data = {rule_type: {os_type: count for os_type, count in zip(os_types, generate_
 
 
 def plot_data(data):
+    # Only the PNG is needed, so use the non-interactive Agg backend and skip GUI backend probing
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
     # Prepare data for plotting
     rule_types = ['f', 'd', 'c', 'r', 'p']
     rule_labels = ['file', 'directory', 'command', 'registry', 'process']
@@ -161,7 +165,8 @@ def plot_data(data):
 
     plt.tight_layout()
     plt.savefig('rule_type_os_distribution_stacked_thin.png')
-    plt.show()
+    plt.close(fig)
 
 
-plot_data(data)
\ No newline at end of file
+if __name__ == "__main__":
+    plot_data(data)
@@ -1,8 +1,8 @@
 import os
-import yaml
-from collections import defaultdict
-import matplotlib.pyplot as plt
+from collections import defaultdict, Counter
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from yaml_helper import iter_yml, parse_script
 
 # Configure logging to write to a file
 logging.basicConfig(filename='debug_log.txt', level=logging.INFO, 
@@ -16,10 +16,14 @@ os_folders = [
 
 
 def parse_yaml_files(base_dir):
-    data = defaultdict(lambda: defaultdict(int))
+    data = defaultdict(Counter)
+    # Flat (os_type, rule_type) tally while merging; pivoted into data afterwards
+    rule_counts = Counter()
     script_counts = defaultdict(int)
     total_checks = 0
     total_rules = 0
+    os_types = []
+    script_paths = []
 
     for os_type in os.listdir(base_dir):
         if os_type not in os_folders or os_type == 'env':
@@ -29,48 +33,38 @@ def parse_yaml_files(base_dir):
         if os.path.isdir(os_path):
             logging.info(f"Processing OS type: {os_type}")
             
-            # Recursively walk through directories and files
-            for root, dirs, files in os.walk(os_path):
-                for script_file in files:
-                    if script_file.endswith('.yml'):
-                        script_path = os.path.join(root, script_file)
-                        logging.info(f"Processing file: {script_path}")
-                        with open(script_path, 'r') as file:
-                            try:
-                                content = yaml.safe_load(file)
-                                checks = content.get('checks', None)
-                                if checks is None or len(checks) == 0:
-                                    logging.warning(f"No or empty 'checks' found in {script_file}")
-                                    continue
-
-                                # Increment the script count for this OS type
-                                script_counts[os_type] += len(checks)
-                                total_checks += len(checks)
-
-                                for check in checks:
-                                    rules = check.get('rules', None)
-                                    if rules is None or len(rules) == 0:
-                                        logging.warning(f"No or empty 'rules' found in check ID {check.get('id', 'unknown')} in {script_file}")
-                                        continue
-                                    
-                                    total_rules += len(rules)
-
-                                    for rule in rules:
-                                        rule_type = rule.split(':')[0]
-                                        if rule.startswith('not '):
-                                            continue
-                                        if rule_type in ['f', 'd', 'c', 'r', 'p']:
-                                            data[os_type][rule_type] += 1
-
-                            except yaml.YAMLError as exc:
-                                logging.error(f"Error parsing {script_path}: {exc}")
-            logging.info(f"Data for {os_type}: {dict(data[os_type])}")
-            logging.info(f"Script count for {os_type}: {script_counts[os_type]}")
+            # Recursively walk through directories and collect every script first
+            os_types.append(os_type)
+            script_paths.extend((os_type, script_path) for script_path in iter_yml(os_path))
+
+    # Parse scripts across cores; each worker sends back only its counts
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(parse_script, [script_path for _, script_path in script_paths], chunksize=32)
+        for (os_type, script_path), result in zip(script_paths, results):
+            if result is None:
+                continue
+
+            check_count, rule_count, rule_types = result
+            # Increment the script count for this OS type
+            script_counts[os_type] += check_count
+            total_checks += check_count
+            total_rules += rule_count
+            rule_counts.update({(os_type, rule_type): count for rule_type, count in rule_types.items()})
+
+    for (os_type, rule_type), count in rule_counts.items():
+        data[os_type][rule_type] = count
+
+    for os_type in os_types:
+        logging.info(f"Data for {os_type}: {dict(data[os_type])}")
+        logging.info(f"Script count for {os_type}: {script_counts[os_type]}")
 
     return data, script_counts, total_checks, total_rules
 
 
 def plot_data(data, script_counts, total_checks, total_rules):
+    # Imported here so parse_yaml_files can be reused without loading matplotlib
+    import matplotlib.pyplot as plt
+
     # Prepare data for plotting
     categories = ['f', 'd', 'c', 'r', 'p']
     labels = ['file', 'directory', 'command', 'registry', 'process']
@@ -127,6 +121,7 @@ def plot_data(data, script_counts, total_checks, total_rules):
     plt.show()
 
 
-base_directory = '.'  # Set to current directory
-data, script_counts, total_checks, total_rules = parse_yaml_files(base_directory)
-plot_data(data, script_counts, total_checks, total_rules)
+if __name__ == "__main__":
+    base_directory = '.'  # Set to current directory
+    data, script_counts, total_checks, total_rules = parse_yaml_files(base_directory)
+    plot_data(data, script_counts, total_checks, total_rules)
@@ -1,8 +1,8 @@
 import os
-import yaml
-from collections import defaultdict
-import matplotlib.pyplot as plt
+from collections import defaultdict, Counter
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from yaml_helper import iter_yml, parse_script
 
 # Configure logging to write to a file
 logging.basicConfig(filename='debug_log.txt', level=logging.INFO, 
@@ -19,7 +19,11 @@ os_folders = [
 
 
 def parse_yaml_files(base_dir):
-    data = defaultdict(lambda: defaultdict(int))
+    data = defaultdict(Counter)
+    # Flat (rule_type, os_type) tally while merging; pivoted into data afterwards
+    rule_counts = Counter()
+    os_types = []
+    script_paths = []
 
     for os_type in os.listdir(base_dir):
         if os_type not in os_folders or os_type == 'env':
@@ -29,41 +33,32 @@ def parse_yaml_files(base_dir):
         if os.path.isdir(os_path):
             logging.info(f"Processing OS type: {os_type}")
             
-            # Recursively walk through directories and files
-            for root, dirs, files in os.walk(os_path):
-                for script_file in files:
-                    if script_file.endswith('.yml'):
-                        script_path = os.path.join(root, script_file)
-                        logging.info(f"Processing file: {script_path}")
-                        with open(script_path, 'r') as file:
-                            try:
-                                content = yaml.safe_load(file)
-                                checks = content.get('checks', None)
-                                if checks is None or len(checks) == 0:
-                                    logging.warning(f"No or empty 'checks' found in {script_file}")
-                                    continue
-
-                                for check in checks:
-                                    rules = check.get('rules', None)
-                                    if rules is None or len(rules) == 0:
-                                        logging.warning(f"No or empty 'rules' found in check ID {check.get('id', 'unknown')} in {script_file}")
-                                        continue
-
-                                    for rule in rules:
-                                        rule_type = rule.split(':')[0]
-                                        if rule.startswith('not '):
-                                            continue
-                                        if rule_type in ['f', 'd', 'c', 'r', 'p']:
-                                            data[rule_type][os_type] += 1
-
-                            except yaml.YAMLError as exc:
-                                logging.error(f"Error parsing {script_path}: {exc}")
-            logging.info(f"Data for {os_type}: {dict(data[os_type])}")
+            # Recursively walk through directories and collect every script first
+            os_types.append(os_type)
+            script_paths.extend((os_type, script_path) for script_path in iter_yml(os_path))
+
+    # Parse scripts across cores; each worker sends back only its counts
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(parse_script, [script_path for _, script_path in script_paths], chunksize=32)
+        for (os_type, script_path), result in zip(script_paths, results):
+            if result is None:
+                continue
+
+            rule_counts.update({(rule_type, os_type): count for rule_type, count in result[2].items()})
+
+    for (rule_type, os_type), count in rule_counts.items():
+        data[rule_type][os_type] = count
+
+    for os_type in os_types:
+        logging.info(f"Data for {os_type}: {dict(data[os_type])}")
 
     return data
 
 
 def plot_data(data):
+    # Imported here so parse_yaml_files can be reused without loading matplotlib
+    import matplotlib.pyplot as plt
+
     # Prepare data for plotting
     rule_types = ['f', 'd', 'c', 'r', 'p']
     rule_labels = ['file', 'directory', 'command', 'registry', 'process']
@@ -107,6 +102,7 @@ def plot_data(data):
     plt.show()
 
 
-base_directory = '.'  # Set to current directory
-data = parse_yaml_files(base_directory)
-plot_data(data)
+if __name__ == "__main__":
+    base_directory = '.'  # Set to current directory
+    data = parse_yaml_files(base_directory)
+    plot_data(data)
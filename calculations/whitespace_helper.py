@@ -1,16 +1,20 @@
 import sys
 
+NEWLINE_TO_SPACE = bytes.maketrans(b'\r\n', b'  ')
+
+
 def replace_newlines_with_spaces(file_path):
     try:
-        # Read the file content
-        with open(file_path, 'r', encoding='utf-8') as file:
+        # Read the raw bytes; '\r' and '\n' never occur inside a UTF-8 multi-byte
+        # sequence, so there is no need to decode the file
+        with open(file_path, 'rb') as file:
             content = file.read()
 
-        # Replace newlines with spaces
-        modified_content = content.replace('\n', ' ')
+        # Replace newlines (including '\r\n' and bare '\r') with spaces
+        modified_content = content.replace(b'\r\n', b'\n').translate(NEWLINE_TO_SPACE)
 
         # Write the modified content back to the file
-        with open(file_path, 'w', encoding='utf-8') as file:
+        with open(file_path, 'wb') as file:
             file.write(modified_content)
 
         print(f"Successfully replaced newlines with spaces and wrote back to the file: {file_path}")
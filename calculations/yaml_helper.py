@@ -0,0 +1,149 @@
+import os
+import json
+import yaml
+import logging
+from collections import Counter
+try:
+    # Bare libyaml event parser: no composer/constructor attached
+    from yaml.cyaml import CParser as EventParser
+except ImportError:
+    from yaml import SafeLoader as EventParser
+
+RULE_TYPES = frozenset('fdcrp')
+
+
+def iter_yml(root):
+    # Depth-first walk with os.scandir; DirEntry caches the file type, so no
+    # extra stat per entry as with os.walk.
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.yml'):
+                    yield entry.path
+
+
+def extract_checks(stream):
+    # Pull events straight from the libyaml parser and keep only each check's id
+    # and rules, so the rest of the policy (descriptions, compliance, ...) is
+    # never turned into Python objects.
+    # Returns {'checks': [{'id': ..., 'rules': [...]}, ...]}.
+    checks = None
+    check = None
+    rules = None
+    # One frame per open collection: [is_mapping, role, current key, expecting key]
+    stack = []
+
+    parser = EventParser(stream)
+    try:
+        event = parser.get_event()
+        while type(event) is not yaml.StreamEndEvent:
+            event_type = type(event)
+            if event_type is yaml.MappingEndEvent or event_type is yaml.SequenceEndEvent:
+                stack.pop()
+                event = parser.get_event()
+                continue
+            is_scalar = event_type is yaml.ScalarEvent
+            is_mapping = event_type is yaml.MappingStartEvent
+            is_sequence = event_type is yaml.SequenceStartEvent
+            if not (is_scalar or is_mapping or is_sequence or event_type is yaml.AliasEvent):
+                event = parser.get_event()
+                continue
+
+            parent = stack[-1] if stack else None
+            role = None
+            if parent is not None and parent[0] and parent[3]:
+                # Mapping key
+                parent[2] = event.value if is_scalar else None
+                parent[3] = False
+            else:
+                key = parent[2] if parent is not None and parent[0] else None
+                parent_role = parent[1] if parent is not None else None
+                if parent is not None and parent[0]:
+                    parent[3] = True
+
+                if len(stack) == 1 and key == 'checks':
+                    if is_sequence:
+                        checks = []
+                        role = 'checks'
+                elif parent_role == 'checks' and is_mapping:
+                    check = {}
+                    checks.append(check)
+                    role = 'check'
+                elif parent_role == 'check' and key == 'id' and is_scalar:
+                    check['id'] = event.value
+                elif parent_role == 'check' and key == 'rules':
+                    if is_sequence:
+                        rules = []
+                        role = 'rules'
+                    else:
+                        rules = None
+                    check['rules'] = rules
+                elif parent_role == 'rules' and is_scalar:
+                    rules.append(event.value)
+
+            if is_mapping or is_sequence:
+                stack.append([is_mapping, role, None, True])
+            event = parser.get_event()
+    finally:
+        parser.dispose()
+
+    return {'checks': checks}
+
+
+def load_cached(path):
+    # Reuse the JSON sidecar written by a previous run unless the YAML is newer.
+    # Delete the *.yml.json files to force a re-parse.
+    cache_path = path + '.json'
+    try:
+        if os.path.getmtime(path) <= os.path.getmtime(cache_path):
+            with open(cache_path, 'rb') as cache_file:
+                return json.loads(cache_file.read())
+    except (OSError, ValueError):
+        pass
+
+    with open(path, 'rb') as file:
+        content = extract_checks(file)
+
+    try:
+        with open(cache_path, 'w') as cache_file:
+            json.dump(content, cache_file)
+    except OSError:
+        pass
+    return content
+
+
+def count_rule_types(rules):
+    # 'not ' rules start with 'n' and never have ':' at index 1, so they drop out here.
+    return Counter(rule[0] for rule in rules if len(rule) > 1 and rule[1] == ':' and rule[0] in RULE_TYPES)
+
+
+def parse_script(path):
+    # Worker for ProcessPoolExecutor: parse one script and return only its
+    # counts as (check_count, rule_count, Counter of rule types), or None.
+    script_file = os.path.basename(path)
+    logging.info(f"Processing file: {path}")
+    try:
+        content = load_cached(path)
+    except (yaml.YAMLError, OSError) as exc:
+        # A broken or unreadable script must not take down the whole pool.map
+        logging.error(f"Error parsing {path}: {exc}")
+        return None
+
+    checks = content.get('checks', None)
+    if checks is None or len(checks) == 0:
+        logging.warning(f"No or empty 'checks' found in {script_file}")
+        return None
+
+    script_rules = []
+    for check in checks:
+        rules = check.get('rules', None)
+        if rules is None or len(rules) == 0:
+            logging.warning(f"No or empty 'rules' found in check ID {check.get('id', 'unknown')} in {script_file}")
+            continue
+
+        script_rules.extend(rules)
+
+    return len(checks), len(script_rules), count_rule_types(script_rules)
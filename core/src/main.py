@@ -40,52 +40,84 @@
 
 import sys
 import os
+import re
+import json
 import yaml
-import random
-import paramiko  # For SSH connection to get OS info
+import uuid
 from datetime import datetime
+from itertools import chain
 from loguru import logger
-from script_processor import ScriptProcessor
+
+# Prefer the libyaml-backed loader/dumper; the representers below are Python hooks either way
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as BaseDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper as BaseDumper
+
+# Fields of each report check, in output order
+REPORT_CHECK_FIELDS = (
+    'id', 'title', 'result', 'description', 'rationale', 'impact',
+    'remediation', 'references', 'compliance', 'condition', 'rules'
+)
+
+# loguru's default record layout plus the id of the check being executed ('-' outside
+# of checks); checks run concurrently, so their records interleave in the log
+LOG_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "check {extra[check_id]} | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+
+# Runs of whitespace collapsed when flattening long text fields onto one line
+WHITESPACE_RE = re.compile(r'\s+')
 
 
 def generate_unique_filename(directory, base_filename, extension):
     """
     Generate a unique filename by appending a serial number if the file exists.
+    The file is created with O_EXCL, so the name is reserved atomically even
+    when several runs start in the same second.
     """
     counter = 0
     filename = f"{base_filename}.{extension}"
-    full_path = os.path.join(directory, filename)
-    while os.path.exists(full_path):
-        counter += 1
-        filename = f"{base_filename}_{counter}.{extension}"
+    while True:
         full_path = os.path.join(directory, filename)
-    return full_path
+        try:
+            os.close(os.open(full_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            return full_path
+        except FileExistsError:
+            counter += 1
+            filename = f"{base_filename}_{counter}.{extension}"
+
 
+# /etc/os-release entries giving the OS name; PRETTY_NAME is preferred over NAME
+PRETTY_NAME_RE = re.compile(r'^PRETTY_NAME=(.*)$', re.MULTILINE)
+NAME_RE = re.compile(r'^NAME=(.*)$', re.MULTILINE)
 
-def get_os_info(ssh_details):
+def get_os_info(ssh_details, ssh_pool):
     """
     Retrieve the operating system information from the remote host via SSH.
+    Borrows the connection the executor already opened instead of logging in again;
+    the name is kept on that connection, so a reconnect reads it again.
     """
     try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(
+        ssh_manager = ssh_pool.acquire(
             ssh_details['ip'],
-            port=ssh_details['port'],
-            username=ssh_details['username'],
-            password=ssh_details['password']
+            ssh_details['username'],
+            ssh_details['password'],
+            ssh_details['port']
         )
-        stdin, stdout, stderr = ssh.exec_command('cat /etc/os-release')
-        output = stdout.read().decode()
-        ssh.close()
-        for line in output.splitlines():
-            if line.startswith('PRETTY_NAME'):
-                os_info = line.split('=')[1].strip().strip('"')
-                return os_info
-            elif line.startswith('NAME'):
-                os_info = line.split('=')[1].strip().strip('"')
-                return os_info
-        return "Unknown"
+        try:
+            if ssh_manager.os_info is not None:
+                return ssh_manager.os_info
+            output, error, exit_status = ssh_manager.execute_command('cat /etc/os-release')
+            match = PRETTY_NAME_RE.search(output) or NAME_RE.search(output)
+            if match is None:
+                return "Unknown"
+            ssh_manager.os_info = match.group(1).strip().strip('"')
+            return ssh_manager.os_info
+        finally:
+            ssh_pool.release(ssh_manager)
     except Exception as e:
         logger.error(f"Error retrieving OS information: {str(e)}")
         return "Unknown"
@@ -99,32 +131,35 @@ def represent_flow_sequence(dumper, data):
     return dumper.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=True)
 
 
-class CustomDumper(yaml.SafeDumper):
+# Compliance values repeat across checks (e.g. the same CIS section); share one
+# FlowSequence per distinct value. Safe because CustomDumper never writes aliases.
+FLOW_SEQUENCE_CACHE = {}
+
+
+def get_flow_sequence(value):
+    if not isinstance(value, list):
+        value = [value]
+    # Ensure all elements are strings
+    key = tuple(map(str, value))
+    flow_sequence = FLOW_SEQUENCE_CACHE.get(key)
+    if flow_sequence is None:
+        flow_sequence = FLOW_SEQUENCE_CACHE[key] = FlowSequence(key)
+    return flow_sequence
+
+
+class CustomDumper(BaseDumper):
     def ignore_aliases(self, data):
         return True
 
-    def represent_mapping(self, tag, mapping, flow_style=None):
-        # Override this method to prevent keys from being quoted
-        value = []
-        node = yaml.MappingNode(tag, value, flow_style=flow_style)
-        if self.alias_key is not None:
-            self.represented_objects[self.alias_key] = node
-        best_style = True
-        for item_key, item_value in mapping.items():
-            node_key = self.represent_data(item_key)
-            if isinstance(node_key, yaml.ScalarNode) and node_key.style is not None:
-                node_key.style = None  # Remove style from keys to prevent quotes
-            node_value = self.represent_data(item_value)
-            if not (isinstance(node_key, yaml.ScalarNode) and not node_key.style) or \
-               not (isinstance(node_value, yaml.ScalarNode) and not node_value.style):
-                best_style = False
-            value.append((node_key, node_value))
-        if flow_style is None:
-            if self.default_flow_style is not None:
-                node.flow_style = self.default_flow_style
-            else:
-                node.flow_style = best_style
-        return node
+
+def represent_plain_key_mapping(dumper, data):
+    # str_presenter double-quotes every string; mapping keys stay plain (the emitter
+    # still falls back to quoting a key that cannot be written plain)
+    node = dumper.represent_mapping('tag:yaml.org,2002:map', data)
+    for node_key, _ in node.value:
+        if isinstance(node_key, yaml.ScalarNode):
+            node_key.style = None
+    return node
 
 
 def str_presenter(dumper, data):
@@ -137,12 +172,36 @@ def str_presenter(dumper, data):
 
 
 CustomDumper.add_representer(str, str_presenter)
+CustomDumper.add_representer(dict, represent_plain_key_mapping)
 CustomDumper.add_representer(FlowSequence, represent_flow_sequence)
 CustomDumper.add_representer(int, CustomDumper.represent_int)
 CustomDumper.add_representer(float, CustomDumper.represent_float)
 CustomDumper.add_representer(bool, CustomDumper.represent_bool)
 
 
+def write_report(outfile, audit_info: dict, ordered_checks: list):
+    """
+    Write the report one check at a time, so only a single check's YAML node
+    graph is held in memory. The text is identical to dumping
+    {'audit_info': ..., 'checks': [...]} in one call.
+    """
+    dump_options = dict(
+        Dumper=CustomDumper,
+        default_flow_style=False,
+        allow_unicode=True,
+        sort_keys=False,
+        width=4096  # Large width to prevent line wrapping
+    )
+    yaml.dump({'audit_info': audit_info}, outfile, **dump_options)
+    if not ordered_checks:
+        yaml.dump({'checks': []}, outfile, **dump_options)
+        return
+    outfile.write('checks:\n')
+    for ordered_check in ordered_checks:
+        # A one-item top-level sequence renders exactly like an entry of the 'checks' block list
+        yaml.dump([ordered_check], outfile, **dump_options)
+
+
 def main(file_path: str, ssh_details: dict):
     try:
         # Create 'reports' directory if it doesn't exist
@@ -153,7 +212,7 @@ def main(file_path: str, ssh_details: dict):
         os.makedirs(logs_dir, exist_ok=True)
 
         # Generate a unique detection ID and timestamp
-        detection_id = random.randint(1000, 9999)
+        detection_id = uuid.uuid4().hex[:8]
         current_time_str = datetime.now().strftime("%Y%m%d_%H%M%S")
         base_name = f"{current_time_str}_{detection_id}"
 
@@ -161,43 +220,48 @@ def main(file_path: str, ssh_details: dict):
         output_file = generate_unique_filename(reports_dir, f"report_{base_name}", "yml")
         log_file = generate_unique_filename(logs_dir, f"log_{base_name}", "log")
 
-        # Configure loguru to log to both stderr and a file
+        # Configure loguru to log to both stderr and a file; sinks are written from a
+        # background queue, and LOG_LEVEL=DEBUG restores the full debug output
+        log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
         logger.remove()
-        logger.add(sys.stderr, level="DEBUG")
-        logger.add(log_file, level="DEBUG")
+        logger.configure(extra={"check_id": "-"})
+        logger.add(sys.stderr, level=log_level, format=LOG_FORMAT, enqueue=True)
+        logger.add(log_file, level=log_level, format=LOG_FORMAT, enqueue=True, rotation="50 MB")
 
         # Add these lines
         logger.info(f"Logging to file: {log_file}")
         logger.info(f"Report will be saved to: {output_file}")
 
-        # Step 1: Read the YAML file content
-        with open(file_path, "r") as file:
-            file_content = file.read()
-
-        # Parse the YAML data
-        yaml_data = yaml.safe_load(file_content)
-        checks = yaml_data.get('checks', [])
+        # Step 1: Parse the YAML straight from the file; this parsed data is validated and
+        # turned into the semantic tree, so the file is read and parsed only once
+        with open(file_path, "rb") as file:
+            yaml_data = yaml.load(file, Loader=SafeLoader)
 
         # Step 2: Initialize ScriptProcessor
+        # Imported here so usage errors exit without loading the executor/paramiko stack
+        from script_processor import ScriptProcessor
         processor = ScriptProcessor()
 
-        # Step 3: Process the file content to generate the semantic tree JSON
-        tree_json = processor.process_yml(file_content)
+        # Step 3: Validate the parsed script and generate the semantic tree (kept as a dict for the executor)
+        semantic_tree = processor.process_data(yaml_data, serialize=False)
 
         # Step 4: Check if processing resulted in an error
-        if isinstance(tree_json, dict) and tree_json.get("status") == "error":
+        if semantic_tree.get("status") == "error":
             # Log the error details if processing failed
-            logger.error(f"Error Code: {tree_json.get('error_code')}")
-            logger.error(f"Error Message: {tree_json.get('error_message')}")
-            logger.error(f"Details: {tree_json.get('details')}")
+            logger.error(f"Error Code: {semantic_tree.get('error_code')}")
+            logger.error(f"Error Message: {semantic_tree.get('error_message')}")
+            logger.error(f"Details: {semantic_tree.get('details')}")
             sys.exit(1)
         else:
-            # Log the generated tree JSON string if processing succeeded
+            # Log the generated tree JSON string if processing succeeded (only serialized when DEBUG is enabled)
             logger.info("Generated Tree JSON:")
-            logger.debug(tree_json)
+            logger.opt(lazy=True).debug("{}", lambda: json.dumps(semantic_tree, separators=(',', ':')))
+
+        # The processor validated this same parsed data, so 'checks' is known to be present
+        checks = yaml_data['checks']
 
         # Step 5: Execute the semantic tree using the executor method
-        result = processor.executor(tree_json, ssh_details)
+        result = processor.executor(semantic_tree, ssh_details)
 
         # Step 6: Check and log the execution result
         if isinstance(result, dict) and result.get("status") == "error":
@@ -211,68 +275,55 @@ def main(file_path: str, ssh_details: dict):
             logger.info("Execution Results:")
             logger.debug(result)
 
-            # Initialize statistics counters
+            # Initialize statistics counters; pass/fail totals come straight from the executor results
+            results_by_id = result.get('results', {})
+            pass_ids = {check_id for check_id, check_result in results_by_id.items() if check_result.get('result') == 'pass'}
+            passes = len(pass_ids)
+            fails = len(results_by_id) - passes
             total_checks = 0
             total_rules = 0
-            passes = 0
-            fails = 0
 
-            # Get operating system info
-            operating_system = get_os_info(ssh_details)
+            # Get operating system info, then drop the pooled SSH connections
+            operating_system = get_os_info(ssh_details, processor.ssh_pool)
+            processor.ssh_pool.close_all()
 
-            # Map the result with the YAML rules
+            # Map the result with the YAML rules and build each ordered report entry in the same pass
+            ordered_checks = []
             for check in checks:
                 check_id = check.get('id')
-                if check_id is None:
-                    continue  # Skip checks without an ID
-                total_checks += 1  # Increment total checks
-
-                # Get the check result
-                check_result = result.get('results', {}).get(check_id)
-                if check_result is None:
-                    continue  # Skip if there's no result for this check
-
-                # Determine pass or fail
-                check_status = check_result.get('result')
-                result_status = 'Passed' if check_status == 'pass' else 'Failed'
-
-                # Count passes and fails
-                if result_status == 'Passed':
-                    passes += 1
-                else:
-                    fails += 1
-
-                # Update the check with the result
-                check['result'] = result_status
-
-                # Update the rules with their results
-                rule_results = check_result.get('rule_results', [])
-                rules = check.get('rules', [])
-                total_rules += len(rules)
-                new_rules = []
-                for i, rule in enumerate(rules):
-                    rule_status = 'pass' if rule_results[i] else 'fail'
-                    new_rules.append({rule_status: rule})
-                check['rules'] = new_rules
-
-                # Reformat the compliance field to use FlowSequence
-                compliance_list = check.get('compliance', [])
-                new_compliance = []
-                for item in compliance_list:
-                    if isinstance(item, dict):
-                        for key, value in item.items():
-                            if not isinstance(value, list):
-                                value = [value]
-                            # Ensure all elements are strings
-                            value = [str(v) for v in value]
-                            value = FlowSequence(value)
-                            new_compliance.append({key: value})
-                check['compliance'] = new_compliance
-
-                # Ensure long text fields are single-line strings
-                for field in ['description', 'rationale', 'impact', 'remediation']:
-                    if field in check and isinstance(check[field], str):
-                        check[field] = ' '.join(check[field].split())
+                # Skip checks without an ID, and checks without a result
+                check_result = results_by_id.get(check_id) if check_id is not None else None
+                if check_id is not None:
+                    total_checks += 1  # Increment total checks
+
+                if check_result is not None:
+                    # Update the check with the result
+                    check['result'] = 'Passed' if check_id in pass_ids else 'Failed'
+
+                    # Update the rules with their results
+                    rule_results = check_result.get('rule_results', [])
+                    rules = check.get('rules', [])
+                    total_rules += len(rules)
+                    new_rules = []
+                    for i, rule in enumerate(rules):
+                        rule_status = 'pass' if rule_results[i] else 'fail'
+                        new_rules.append({rule_status: rule})
+                    check['rules'] = new_rules
+
+                    # Reformat the compliance field to use FlowSequence
+                    compliance_list = check.get('compliance', [])
+                    check['compliance'] = [
+                        {key: get_flow_sequence(value)}
+                        for key, value in chain.from_iterable(item.items() for item in compliance_list if isinstance(item, dict))
+                    ]
+
+                    # Ensure long text fields are single-line strings
+                    for field in ['description', 'rationale', 'impact', 'remediation']:
+                        if field in check and isinstance(check[field], str):
+                            check[field] = WHITESPACE_RE.sub(' ', check[field]).strip()
+
+                # Order the fields in each check as specified (see REPORT_CHECK_FIELDS)
+                ordered_checks.append({field: check.get(field) for field in REPORT_CHECK_FIELDS})
 
             # Calculate pass percentage
             pass_percentage = (passes / total_checks * 100) if total_checks > 0 else 0
@@ -289,40 +340,9 @@ def main(file_path: str, ssh_details: dict):
                 'passes_checks': passes
             }
 
-            # Prepare the final output data in the specified order
-            output_yaml = {
-                'audit_info': audit_info,
-                'checks': []
-            }
-
-            # Order the fields in each check as specified
-            for check in checks:
-                ordered_check = {
-                    'id': check.get('id'),
-                    'title': check.get('title'),
-                    'result': check.get('result'),
-                    'description': check.get('description'),
-                    'rationale': check.get('rationale'),
-                    'impact': check.get('impact'),
-                    'remediation': check.get('remediation'),
-                    'references': check.get('references'),
-                    'compliance': check.get('compliance'),
-                    'condition': check.get('condition'),
-                    'rules': check.get('rules'),
-                }
-                output_yaml['checks'].append(ordered_check)
-
             # Write the output to a YAML file with proper formatting
             with open(output_file, 'w') as outfile:
-                yaml.dump(
-                    output_yaml,
-                    outfile,
-                    Dumper=CustomDumper,
-                    default_flow_style=False,
-                    allow_unicode=True,
-                    sort_keys=False,
-                    width=4096  # Large width to prevent line wrapping
-                )
+                write_report(outfile, audit_info, ordered_checks)
 
             logger.info(f"Results have been written to {output_file}")
 
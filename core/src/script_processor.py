@@ -37,13 +37,35 @@
 """
 
 import json
-from typing import Union, Dict, List
+import hashlib
+from typing import Union, Dict, List, Optional
 from enum import Enum
 from loguru import logger  # 添加 loguru
 
 from .script_validator import ScriptValidator, ValidationError
 from .semantic_tree_builder import SemanticTreeBuilder
-from .semantic_tree_executor import SemanticTreeExecutor
+from .semantic_tree_executor import SemanticTreeExecutor, SSHConnectionPool
+
+
+# orjson is several times faster for the tree payload; stdlib json is the fallback
+try:
+    import orjson
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'))
+
+    json_loads = json.loads
+
+
+# Number of distinct YAML documents whose tree JSON is kept in memory
+TREE_CACHE_SIZE = 128
+# Number of distinct checks whose tree is kept in memory
+CHECK_TREE_CACHE_SIZE = 4096
 
 
 class ScriptProcessorError(Enum):
@@ -57,22 +79,78 @@ class ScriptProcessor:
     def __init__(self):
         self.validator = ScriptValidator()
         self.tree_builder = SemanticTreeBuilder()
+        self.ssh_pool = SSHConnectionPool()     # Shared by every executor() call on this processor
+        self.tree_cache = {}                    # Trees of successfully processed YAML, keyed by content hash
+        self.check_tree_cache = {}              # Rule trees of single checks, keyed by (condition, rules)
+
+    def process_yml(self, file_content: Union[str, bytes], serialize: bool = True) -> Union[str, Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]]:
+        # serialize=False returns the tree as a dict, which executor() accepts as-is,
+        # so an in-process caller skips the JSON dump/parse round-trip; its 'rules'
+        # lists are shared with the processor's caches and must not be modified
+        # The same audit YAML is often processed repeatedly (re-runs, several hosts);
+        # identical content always yields the same tree, so skip validation and building
+        raw_content = file_content.encode('utf-8') if isinstance(file_content, str) else file_content
+        content_hash = hashlib.blake2b(raw_content, digest_size=16).digest()
+        result = self.tree_cache.get(content_hash)
+        if result is not None:
+            logger.info("Reusing semantic tree built for identical YAML content.")
+        else:
+            result = self._process_script(file_content=file_content)
+            if result.get("status") == "error":
+                return result
+            if len(self.tree_cache) >= TREE_CACHE_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self.tree_cache[next(iter(self.tree_cache))]
+            self.tree_cache[content_hash] = result
+        if serialize:
+            return json_dumps(result)
+        # The cached tree must survive callers that edit what they get back: each call
+        # gets its own top-level dict and check dicts. The rule subtrees below them are
+        # shared with the cache (and between checks) and must be treated as read-only.
+        return {"checks": [dict(check) for check in result["checks"]]}
+
+    def process_data(self, script_data: Dict, serialize: bool = True) -> Union[str, Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]]:
+        # For callers that already parsed the YAML (e.g. straight from the file object)
+        result = self._process_script(script_data=script_data)
+        if result.get("status") == "error" or not serialize:
+            return result
+        return json_dumps(result)
 
-    def process_yml(self, file_content: str) -> Union[str, Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]]:
+    def process_trusted(self, script_data: Dict, serialize: bool = True) -> Union[str, Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]]:
+        # For scripts the caller has already validated (e.g. a cached, known-good rule set):
+        # the ScriptValidator pass is skipped and only the trees are built
+        result = self._process_script(script_data=script_data, validate=False)
+        if result.get("status") == "error" or not serialize:
+            return result
+        return json_dumps(result)
+
+    def _process_script(self, file_content: Union[str, bytes, None] = None, script_data: Optional[Dict] = None, validate: bool = True) -> Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]:
+        # The validator and builder are reused across calls; only their errors are per script
+        self.tree_builder.reset()
         try:
-            logger.info("Validating YAML file content.")
-            # Step 1: Validate the YAML file :)
-            script_data = self.validator.validate_file(file_content)
+            # Step 1: Validate the YAML file (or the already parsed script) :)
+            if file_content is not None:
+                logger.info("Validating YAML file content.")
+                script_data = self.validator.validate_file(file_content)
+            elif validate:
+                logger.info("Validating YAML file content.")
+                script_data = self.validator.validate_data(script_data)
             
             # Step 2: Build the semantic tree for each check in the script :)
             checks = []
             for check in script_data['checks']:
-                logger.debug(f"Building tree for check ID: {check['id']}")
-                tree = self.tree_builder.build_tree({
-                    'id': check['id'],
-                    'condition': check['condition'],
-                    'rules': check['rules']
-                })
+                # Compliance bundles repeat the same condition and rules across checks and
+                # files; their rule trees are shared and only the check's id differs
+                check_key = self._check_cache_key(check)
+                rule_trees = self.check_tree_cache.get(check_key) if check_key is not None else None
+                if rule_trees is not None:
+                    checks.append({'id': check['id'], 'condition': check['condition'], 'rules': rule_trees})
+                    continue
+
+                # Arguments are only formatted when a sink takes DEBUG records
+                logger.debug("Building tree for check ID: {}", check['id'])
+                # The validated check already holds the three keys build_tree reads
+                tree = self.tree_builder.build_tree(check)
                 
                 # Step 3: Check for errors during tree building :)
                 if tree is None:
@@ -84,12 +162,17 @@ class ScriptProcessor:
                         "error_message": ScriptProcessorError.TREE_BUILDING_FAILED.value[1],
                         "details": errors
                     }
-                checks.append(json.loads(self.tree_builder.tree_to_json(tree)))
+                check_tree = tree.to_dict()
+                if check_key is not None:
+                    if len(self.check_tree_cache) >= CHECK_TREE_CACHE_SIZE:
+                        # Evict the oldest entry (dicts keep insertion order)
+                        del self.check_tree_cache[next(iter(self.check_tree_cache))]
+                    self.check_tree_cache[check_key] = check_tree['rules']
+                checks.append(check_tree)
             
-            # Step 4: Return the JSON string of the tree if all checks passed :)
-            result = {"checks": checks}
+            # Step 4: Return the tree if all checks passed :)
             logger.info("Semantic tree built successfully.")
-            return json.dumps(result, separators=(',', ':'))
+            return {"checks": checks}
         
         except ValidationError as sve:
             logger.error("Validation failed. Errors: {}", sve.errors)
@@ -109,7 +192,20 @@ class ScriptProcessor:
                 "details": str(e)
             }
         
-    def process_json(self, script_list: List[Dict[str, Union[str, List[str]]]]) -> Union[str, Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]]:
+    def _check_cache_key(self, check: Dict) -> Optional[tuple]:
+        # None when the check holds unhashable values, or an id build_tree would reject;
+        # such checks are simply not cached and go through build_tree every time
+        try:
+            if not isinstance(check['id'], int):
+                return None
+            check_key = (check['condition'], tuple(check['rules']))
+            hash(check_key)
+            return check_key
+        except (KeyError, TypeError):
+            return None
+
+    def process_json(self, script_list: List[Dict[str, Union[str, List[str]]]], serialize: bool = True) -> Union[str, Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]]:
+        self.tree_builder.reset()
         try:
             logger.info("Processing JSON script list.")
             
@@ -119,7 +215,7 @@ class ScriptProcessor:
             # Step 2: Build the semantic tree for each script in the script list :)
             checks = []
             for script in script_list:
-                logger.debug(f"Building tree for script ID: {script['script_id']}")
+                logger.debug("Building tree for script ID: {}", script['script_id'])
                 tree = self.tree_builder.build_tree({
                     'id': script['script_id'],
                     'condition': script.get('condition', ''),
@@ -136,12 +232,12 @@ class ScriptProcessor:
                         "error_message": ScriptProcessorError.TREE_BUILDING_FAILED.value[1],
                         "details": errors
                     }
-                checks.append(json.loads(self.tree_builder.tree_to_json(tree)))
+                checks.append(tree.to_dict())
             
             # Step 4: Return the JSON string of the tree if all checks passed :)
             result = {"checks": checks}
             logger.info("Semantic tree built successfully.")
-            return json.dumps(result, separators=(',', ':'))
+            return json_dumps(result) if serialize else result
         
         except json.JSONDecodeError as je:
             logger.error("JSON decoding failed. Errors: {}", str(je))
@@ -170,18 +266,19 @@ class ScriptProcessor:
                 "details": str(e)
             }
 
-    def executor(self, tree_json: str, ssh_details: Dict[str, Union[str, int]]) -> Dict[str, Union[str, Dict]]:
+    def executor(self, tree_json: Union[str, Dict], ssh_details: Dict[str, Union[str, int]]) -> Dict[str, Union[str, Dict]]:
         try:
             logger.info("Executing semantic tree.")
-            # Step 1: Convert JSON string to a Python dictionary for execution :)
-            semantic_tree = json.loads(tree_json)
+            # Step 1: Convert JSON string to a Python dictionary for execution (dicts are used as-is) :)
+            semantic_tree = json_loads(tree_json) if isinstance(tree_json, (str, bytes)) else tree_json
 
             # Step 2: Initialize the SemanticTreeExecutor with SSH details :)
             executor = SemanticTreeExecutor(
                 ip=ssh_details['ip'],
                 username=ssh_details['username'],
                 password=ssh_details['password'],
-                port=ssh_details.get('port', 22)
+                port=ssh_details.get('port', 22),
+                ssh_pool=self.ssh_pool
             )
 
             # Step 3: Execute the semantic tree :)
@@ -26,7 +26,7 @@
 
     Usage:        The `ScriptValidator` class should be instantiated, and the 
                   `validate_file` method should be used to validate YAML file 
-                  content. Errors encountered during validation are raised as 
+                  content (or `validate_data` for an already parsed script). Errors encountered during validation are raised as 
                   `ValidationError` exceptions with structured error details.
 
     Requirements: Python 3.10.12
@@ -38,8 +38,23 @@
 
 import yaml
 from enum import Enum
+from itertools import repeat
+from typing import Union
 from loguru import logger
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+# Field lists are fixed, so build them once rather than per script
+REQUIRED_SCRIPT_FIELDS = ('id', 'title', 'description', 'rationale', 'remediation', 'condition', 'rules')
+REQUIRED_SCRIPT_FIELD_SET = frozenset(REQUIRED_SCRIPT_FIELDS)
+
+# Distinguishes an absent field from one present with a None value in a single lookup
+MISSING = object()
+
 
 class ScriptValidationError(Enum):
     MISSING_TOP_LEVEL_FIELD = ("V001", "Missing required top-level field")
@@ -66,27 +81,45 @@ class ScriptValidator:
     def __init__(self):
         self.errors = []
 
-    def validate_file(self, file_content: str) -> dict:
+    def validate_file(self, file_content: Union[str, bytes]) -> dict:
         try:
             logger.info("Starting validation for YAML file content.")
-            data = yaml.safe_load(file_content)
-            self.validate_structure(data)
-            self.validate_checks(data.get('checks'))
-            if self.errors:
-                logger.error("Validation failed with errors: {}", self.errors)
-                raise ValidationError(self.errors)
-            logger.info("Validation passed successfully.")
-            return data
+            data = yaml.load(file_content, Loader=SafeLoader)
         except yaml.YAMLError as e:
             logger.error("YAML format error: {}", str(e))
             raise ValidationError([{"code": "YAML_ERROR", "message": f"Invalid YAML format: {str(e)}"}])
+        return self.validate_data(data)
+
+    def validate_data(self, data: dict) -> dict:
+        # Validates an already parsed script, so callers holding the data skip a second YAML parse
+        # Errors are per script; a fresh list (not clear()) leaves earlier ValidationErrors intact
+        self.errors = []
+        logger.info("Validating parsed script data.")
+        self.validate_checks_section(data)
+        if self.errors:
+            logger.error("Validation failed with errors: {}", self.errors)
+            raise ValidationError(self.errors)
+        logger.info("Validation passed successfully.")
+        return data
+
+    def validate_checks_section(self, data: dict):
+        # Takes the whole document: 'checks' is looked up once and its presence,
+        # emptiness and type are settled in one pass; the same errors are reported,
+        # in the same order, as validate_structure() followed by validate_checks()
+        logger.debug("Validating YAML structure.")
+        if 'checks' in data:
+            checks = data['checks']
+        else:
+            self.add_error(ScriptValidationError.MISSING_TOP_LEVEL_FIELD, 'checks')
+            checks = None
+        if not checks:
+            self.add_error(ScriptValidationError.EMPTY_CHECKS)
+        self.validate_checks(checks)
 
     def validate_structure(self, data: dict):
         logger.debug("Validating YAML structure.")
-        required_fields = ['checks']
-        for field in required_fields:
-            if field not in data:
-                self.add_error(ScriptValidationError.MISSING_TOP_LEVEL_FIELD, field)
+        if 'checks' not in data:
+            self.add_error(ScriptValidationError.MISSING_TOP_LEVEL_FIELD, 'checks')
         if not data.get('checks'):
             self.add_error(ScriptValidationError.EMPTY_CHECKS)
 
@@ -101,19 +134,24 @@ class ScriptValidator:
             self.validate_script(check)
 
     def validate_script(self, script: dict):
-        logger.debug("Validating script with ID: {}", script.get('id', 'unknown'))
-        required_fields = ['id', 'title', 'description', 'rationale', 'remediation', 'condition', 'rules']
-        for field in required_fields:
-            if field not in script:
-                self.add_error(ScriptValidationError.MISSING_SCRIPT_FIELD, field, script.get('id', 'unknown'))
-            elif not script.get(field):
-                self.add_error(ScriptValidationError.EMPTY_SCRIPT_FIELD, field, script.get('id', 'unknown'))
+        script_id = script.get('id', 'unknown')
+        logger.debug("Validating script with ID: {}", script_id)
+        # Almost every check is complete: one set difference and one truthiness pass
+        # settle that, and only a faulty check walks the fields to report them in order
+        missing = REQUIRED_SCRIPT_FIELD_SET - script.keys()
+        if missing or not all(script[field] for field in REQUIRED_SCRIPT_FIELDS):
+            for field in REQUIRED_SCRIPT_FIELDS:
+                value = script.get(field, MISSING)
+                if value is MISSING:
+                    self.add_error(ScriptValidationError.MISSING_SCRIPT_FIELD, field, script_id)
+                elif not value:
+                    self.add_error(ScriptValidationError.EMPTY_SCRIPT_FIELD, field, script_id)
 
         if 'rules' in script and not isinstance(script['rules'], list):
-            self.add_error(ScriptValidationError.INVALID_RULES_TYPE, script.get('id', 'unknown'))
+            self.add_error(ScriptValidationError.INVALID_RULES_TYPE, script_id)
 
         if 'compliance' in script:
-            self.validate_compliance(script['compliance'], script.get('id', 'unknown'))
+            self.validate_compliance(script['compliance'], script_id)
 
     def validate_compliance(self, compliance: list, script_id: str):
         if not isinstance(compliance, list):
@@ -126,17 +164,22 @@ class ScriptValidator:
                 self.add_error(ScriptValidationError.INVALID_COMPLIANCE_ENTRY, script_id)
                 continue
 
+            # Well-formed entries are settled by one C-level map(); only a bad one is walked
+            values = item.values()
+            if all(map(isinstance, values, repeat(list, len(values)))):
+                continue
             for key, value in item.items():
                 if not isinstance(value, list):
                     self.add_error(ScriptValidationError.INVALID_COMPLIANCE_VALUE, script_id, key)
 
     def add_error(self, error_type: ScriptValidationError, *args):
+        code, message = error_type.value
         error = {
-            "code": error_type.value[0],
-            "message": error_type.value[1],
+            "code": code,
+            "message": message,
         }
         if args:
-            error.update({"details": args})
+            error["details"] = args
         logger.error("Validation error: {}", error)
         self.errors.append(error)
 
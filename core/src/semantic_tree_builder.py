@@ -42,8 +42,45 @@ from loguru import logger
 import json
 from typing import List, Dict, Optional, Union, Tuple
 from enum import Enum
+from functools import lru_cache
 import re
 
+# orjson serializes the compact tree several times faster; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Separators of the rule grammar, e.g. "f:/etc/passwd -> r:^root && !r:nologin"
+_RULE_SEPARATOR = ' -> '
+_CONTENT_SEPARATOR = ' && '
+
+# "<regex> compare <operator> <number>", with any amount of whitespace around 'compare'
+_NUMERIC_RULE_RE = re.compile(r'^(.*?)\s+compare\s+([<>]=?|==|!=)\s*(\d+)$')
+
+# Canonical instances of the small vocabulary values that otherwise arrive as fresh
+# strings from the YAML loader or regex groups; every tree node then shares one object
+_CONDITIONS = {condition: condition for condition in ('all', 'any', 'none')}
+_COMPARE_OPERATORS = {operator: operator for operator in ('<', '<=', '>', '>=', '==', '!=')}
+
+# Number of distinct regexes whose compile result is remembered
+REGEX_CACHE_SIZE = 4096
+# Number of distinct rule strings whose parse result is kept by a builder
+RULE_CACHE_SIZE = 4096
+# Number of distinct content checks whose shared ContentRule is kept by a builder
+CONTENT_RULE_POOL_SIZE = 4096
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _compile_or_none(regex: str) -> Optional[re.Pattern]:
+    # Rule sets repeat the same patterns across checks and files; each one is
+    # compiled (or found invalid) once
+    try:
+        return re.compile(regex)
+    except re.error:
+        return None
+
 
 class SemanticTreeError(Enum):
     INVALID_ID = ("E001", "Invalid id")
@@ -59,7 +96,19 @@ class SemanticTreeError(Enum):
     UNKNOWN_ERROR = ("E011", "Unknown error")
 
 
-class ExecutionNode:
+class TreeNode:
+    # Shared base of the tree classes. Each keeps its own explicit to_dict(): a
+    # literal dict is faster than a generic loop over the fields.
+    # Trees hold one object per rule and node; slots drop the per-instance __dict__
+    __slots__ = ()
+
+    def __str__(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+class ExecutionNode(TreeNode):
+    __slots__ = ('type', 'main_target', 'sub_target', 'target_pattern')
+
     def __init__(self, type: str, main_target: str, sub_target: str = None, target_pattern: str = None):
         self.type = type                        # Type of the execution node (e.g., 'f' for file, 'd' for directory, 'r' for registry)
         self.main_target = main_target          # Main target path or command
@@ -74,11 +123,10 @@ class ExecutionNode:
             "target_pattern": self.target_pattern
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
 
+class ContentRule(TreeNode):
+    __slots__ = ('content_operator', 'value', 'compare_operator', 'compare_value', 'negation')
 
-class ContentRule:
     def __init__(self, content_operator: str, value: str, compare_operator: str = None, compare_value: str = None, negation: bool = False):
         self.content_operator = content_operator    # Operator used for content matching (e.g., 'r' for regex)
         self.value = value                          # Value to match
@@ -95,11 +143,10 @@ class ContentRule:
             "negation": self.negation
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
 
+class FileRule(TreeNode):
+    __slots__ = ('execution_node', 'content_rules', 'negation')
 
-class FileRule:
     def __init__(self, execution_node: ExecutionNode, content_rules: List[ContentRule] = None, negation: bool = False):
         self.execution_node = execution_node                         # Single ExecutionNode for the file
         self.content_rules = content_rules if content_rules else []  # List of ContentRules applied to the file
@@ -112,11 +159,10 @@ class FileRule:
             "negation": self.negation
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
 
+class DirectoryRule(TreeNode):
+    __slots__ = ('execution_node', 'file_rules', 'negation')
 
-class DirectoryRule:
     def __init__(self, execution_node: ExecutionNode, file_rules: List[FileRule] = None, negation: bool = False):
         self.execution_node = execution_node                # ExecutionNode for the directory
         self.file_rules = file_rules if file_rules else []  # List of FileRules applied to the directory
@@ -129,11 +175,10 @@ class DirectoryRule:
             "negation": self.negation
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
 
+class CommandRule(TreeNode):
+    __slots__ = ('execution_node', 'content_rules', 'negation')
 
-class CommandRule:
     def __init__(self, execution_node: ExecutionNode, content_rules: List[ContentRule] = None, negation: bool = False):
         self.execution_node = execution_node                         # ExecutionNode for the command
         self.content_rules = content_rules if content_rules else []  # List of ContentRules applied to the command output
@@ -146,11 +191,10 @@ class CommandRule:
             "negation": self.negation
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
 
+class ProcessRule(TreeNode):
+    __slots__ = ('execution_node', 'negation')
 
-class ProcessRule:
     def __init__(self, execution_node: ExecutionNode, negation: bool = False):
         self.execution_node = execution_node    # ExecutionNode for the process
         self.negation = negation                # Boolean indicating if the rule is negated
@@ -161,11 +205,10 @@ class ProcessRule:
             "negation": self.negation
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
 
+class RegistryRule(TreeNode):
+    __slots__ = ('execution_node', 'content_rules', 'negation')
 
-class RegistryRule:
     def __init__(self, execution_node: ExecutionNode, content_rules: List[ContentRule] = None, negation: bool = False):
         self.execution_node = execution_node                         # ExecutionNode for the registry key
         self.content_rules = content_rules if content_rules else []  # List of ContentRules applied to the registry key
@@ -178,11 +221,10 @@ class RegistryRule:
             "negation": self.negation
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
 
+class ConditionNode(TreeNode):
+    __slots__ = ('id', 'condition', 'rules')
 
-class ConditionNode:
     def __init__(self, id: str, condition: str, rules: List):
         self.id = id                # the script id
         self.condition = condition  # Condition type ('all', 'any', 'none')
@@ -195,13 +237,19 @@ class ConditionNode:
             "rules": [rule.to_dict() for rule in self.rules]
         }
 
-    def __str__(self):
-        return json.dumps(self.to_dict(), indent=2)
-
 
 class SemanticTreeBuilder:
     def __init__(self):
         self.errors = []
+        self.rule_cache = {}    # Successfully parsed rules keyed by the raw rule string
+        self.content_rule_pool = {}  # Shared ContentRules keyed by all of their fields
+        self.rule_parsers = {   # Rule parser keyed by the rule's "<type>:" prefix
+            'f:': self.parse_file_rule,
+            'd:': self.parse_directory_rule,
+            'c:': self.parse_command_rule,
+            'p:': self.parse_process_rule,
+            'r:': self.parse_registry_rule,
+        }
         logger.debug("SemanticTreeBuilder initialized.")
 
     def add_error(self, error_code: SemanticTreeError, detail: str, id: int, rule_number: int):
@@ -213,28 +261,36 @@ class SemanticTreeBuilder:
             "rule_number": rule_number
         })
 
-    def parse_rule(self, rule: str, id: int, index: int) -> Union[FileRule, DirectoryRule, CommandRule, ProcessRule, RegistryRule, None]:
+    def parse_rule(self, rule: str, id: int, index: int) -> Optional[List[Union[FileRule, DirectoryRule, CommandRule, ProcessRule, RegistryRule]]]:
         try:
+            # Policies repeat the same rule text across checks; parsed rules are
+            # read-only afterwards, so a successful parse can be shared. Failures
+            # are never cached because their errors carry the id and index.
+            if isinstance(rule, str):
+                cached_rule = self.rule_cache.get(rule)
+                if cached_rule is not None:
+                    return cached_rule
+            raw_rule = rule
+
             logger.debug("Parsing rule: {} for id: {}, index: {}", rule, id, index)
             # Check for negation
             negation = rule.startswith('not ')
             if negation:
                 rule = rule[4:]
 
-            # Identify the type of rule and parse accordingly
-            if rule.startswith('f:'):
-                return self.parse_file_rule(rule[2:], negation, id, index)
-            elif rule.startswith('d:'):
-                return self.parse_directory_rule(rule[2:], negation, id, index)
-            elif rule.startswith('c:'):
-                return self.parse_command_rule(rule[2:], negation, id, index)
-            elif rule.startswith('p:'):
-                return self.parse_process_rule(rule[2:], negation, id, index)
-            elif rule.startswith('r:'):
-                return self.parse_registry_rule(rule[2:], negation, id, index)
-            else:
+            # Identify the type of rule by its "<type>:" prefix and parse accordingly
+            parse = self.rule_parsers.get(rule[:2])
+            if parse is None:
                 self.add_error(SemanticTreeError.UNKNOWN_RULE_TYPE, rule, id, index)
                 return None
+            parsed_rule = parse(rule[2:], negation, id, index)
+
+            if parsed_rule:
+                if len(self.rule_cache) >= RULE_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    del self.rule_cache[next(iter(self.rule_cache))]
+                self.rule_cache[raw_rule] = parsed_rule
+            return parsed_rule
         except Exception as e:
             logger.exception("Exception encountered while parsing rule: {} for id: {}, index: {}", rule, id, index)
             self.add_error(SemanticTreeError.UNKNOWN_ERROR, str(e), id, index)
@@ -242,8 +298,9 @@ class SemanticTreeBuilder:
 
     def parse_file_rule(self, rule: str, negation: bool, id: int, index: int) -> Optional[FileRule]:
         logger.debug("Parsing file rule: {} for id: {}, index: {}", rule, id, index)
-        # Split on '->', accounting for rules without content checks
-        parts = rule.split(' -> ')
+        # Split on '->', accounting for rules without content checks; a third part
+        # already makes the rule invalid, so the scan stops there
+        parts = rule.split(_RULE_SEPARATOR, 2)
 
         # Check the basic format
         if len(parts) == 0 or len(parts) > 2 or not parts[0].strip():
@@ -281,8 +338,9 @@ class SemanticTreeBuilder:
     def parse_directory_rule(self, rule: str, negation: bool, id: int, index: int) -> Optional[List[DirectoryRule]]:
         logger.debug("Parsing directory rule: {} for id: {}, index: {}", rule, id, index)
 
-        # Split the rule into parts by '->', handling potential content checks
-        parts = rule.split(' -> ')
+        # Split the rule into parts by '->', handling potential content checks;
+        # only the first three parts are used, so the scan stops after them
+        parts = rule.split(_RULE_SEPARATOR, 3)
 
         # Check the basic format
         if len(parts) == 0 or not parts[0].strip():
@@ -342,12 +400,13 @@ class SemanticTreeBuilder:
 
         return directory_rules
 
-    def parse_command_rule(self, rule: str, negation: bool, id: int, index: int) -> Optional[CommandRule]:
+    def parse_command_rule(self, rule: str, negation: bool, id: int, index: int) -> Optional[List[CommandRule]]:
         logger.debug("Parsing command rule: {} for id: {}, index: {}", rule, id, index)
 
-        # Split the rule into parts by '->'
-        rule = rule.replace(' -> -> ', ' -> ')
-        parts = rule.split(' -> ')
+        # Split the rule into parts by '->'; everything after the second '->' stays
+        # in one piece as the second level rules
+        rule = rule.replace(' -> -> ', _RULE_SEPARATOR)
+        parts = rule.split(_RULE_SEPARATOR, 2)
 
         # Check if we have at least two parts for a valid command rule
         if len(parts) < 2:
@@ -371,7 +430,7 @@ class SemanticTreeBuilder:
 
         # Process the second level of content rules if present
         if len(parts) > 2:
-            second_level_rules = ' -> '.join(parts[2:]).strip()  # Reconstruct the second level rules
+            second_level_rules = parts[2].strip()
             second_level_content_rules = self.parse_content_rule(second_level_rules, "command", id, index)
             if second_level_content_rules is None:
                 self.add_error(SemanticTreeError.INVALID_COMMAND_RULE, f"Failed to parse second level content rules: {second_level_rules}", id, index)
@@ -381,9 +440,9 @@ class SemanticTreeBuilder:
 
         # Create and return the CommandRule
         command_rule = CommandRule(execution_node=execution_node, content_rules=content_rules, negation=negation)
-        return command_rule
+        return [command_rule]
 
-    def parse_process_rule(self, rule: str, negation: bool, id: int, index: int) -> ProcessRule:
+    def parse_process_rule(self, rule: str, negation: bool, id: int, index: int) -> List[ProcessRule]:
         logger.debug("Parsing process rule: {} for id: {}, index: {}", rule, id, index)
 
         if rule.startswith('r:'):
@@ -391,12 +450,13 @@ class SemanticTreeBuilder:
             execution_node = ExecutionNode(type='p', main_target=None, target_pattern=rule)
         else:
             execution_node = ExecutionNode(type='p', main_target=rule)
-        return ProcessRule(execution_node=execution_node, negation=negation)
+        return [ProcessRule(execution_node=execution_node, negation=negation)]
 
-    def parse_registry_rule(self, rule: str, negation: bool, id: int, index: int) -> Optional[RegistryRule]:
+    def parse_registry_rule(self, rule: str, negation: bool, id: int, index: int) -> Optional[List[RegistryRule]]:
         logger.debug("Parsing registry rule: {} for id: {}, index: {}", rule, id, index)
 
-        parts = rule.split(' -> ')
+        # Key, value and then the content rules, which keep any further '->' as-is
+        parts = rule.split(_RULE_SEPARATOR, 2)
         if len(parts) < 1:
             self.add_error(SemanticTreeError.INVALID_REGISTRY_RULE, rule, id, index)
             return None
@@ -407,30 +467,25 @@ class SemanticTreeBuilder:
         content_rules = []
 
         if len(parts) > 2:
-            content_rules = self.parse_content_rule(' -> '.join(parts[2:]), "registry", id, index)
+            content_rules = self.parse_content_rule(parts[2], "registry", id, index)
             if content_rules is None:
                 self.add_error(SemanticTreeError.INVALID_REGISTRY_RULE, rule, id, index)
                 return None
 
         execution_node = ExecutionNode(type='r', main_target=main_target, sub_target=sub_target, target_pattern=target_pattern)
-        return RegistryRule(execution_node=execution_node, content_rules=content_rules, negation=negation)
+        return [RegistryRule(execution_node=execution_node, content_rules=content_rules, negation=negation)]
 
     def parse_content_rule(self, rule: str, caller: str, id: int, index: int) -> Optional[List['ContentRule']]:
         content_rules = []
-        rule_parts = rule.split(' && ')
+        # Most content checks are a single condition; skip the split list for them
+        rule_parts = rule.split(_CONTENT_SEPARATOR) if _CONTENT_SEPARATOR in rule else (rule,)
 
         for part in rule_parts:
             negation, part = self._check_negation(part.strip())
 
             if caller == "registry" and part and not part.startswith('r:') and not part.startswith('n:'):
                 # For registry rules, if the part is not starting with 'r:' or 'n:', treat it as a sub_target value
-                content_rules.append(ContentRule(
-                    content_operator=None,
-                    value=part,
-                    compare_operator=None,
-                    compare_value=None,
-                    negation=negation
-                ))
+                content_rules.append(self._content_rule(None, part, None, None, negation))
             else:
                 if part.startswith('r:'):
                     content_operator, value = 'r', part[2:].strip()
@@ -453,25 +508,36 @@ class SemanticTreeBuilder:
                     logger.error(f"Rule must start with 'r:' or 'n:': {part}")
                     return None
 
-                content_rules.append(ContentRule(
-                    content_operator=content_operator,
-                    value=value,
-                    compare_operator=compare_operator if content_operator == 'n' else None,
-                    compare_value=compare_value if content_operator == 'n' else None,
-                    negation=negation
+                content_rules.append(self._content_rule(
+                    content_operator,
+                    value,
+                    compare_operator if content_operator == 'n' else None,
+                    compare_value if content_operator == 'n' else None,
+                    negation
                 ))
 
         return content_rules
 
+    def _content_rule(self, content_operator: Optional[str], value: str, compare_operator: Optional[str], compare_value: Optional[str], negation: bool) -> ContentRule:
+        # The same content check recurs under many different rules (e.g. one regex
+        # applied to several files); identical ones share a single read-only ContentRule
+        key = (content_operator, value, compare_operator, compare_value, negation)
+        content_rule = self.content_rule_pool.get(key)
+        if content_rule is None:
+            content_rule = ContentRule(*key)
+            if len(self.content_rule_pool) >= CONTENT_RULE_POOL_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self.content_rule_pool[next(iter(self.content_rule_pool))]
+            self.content_rule_pool[key] = content_rule
+        return content_rule
+
     def _check_negation(self, part: str) -> Tuple[bool, str]:
-        return (part.startswith('!'), part[1:]) if part.startswith('!') else (False, part)
+        if part[:1] == '!':
+            return True, part[1:]
+        return False, part
 
     def _is_valid_regex(self, regex: str) -> bool:
-        try:
-            re.compile(regex)
-            return True
-        except re.error:
-            return False
+        return _compile_or_none(regex) is not None
 
     def _preprocess_regex(self, regex: str) -> str:
         # Replace \p with an empty string using raw string notation
@@ -479,12 +545,13 @@ class SemanticTreeBuilder:
 
     def _parse_numeric_rule(self, part: str, id: int, index: int) -> Optional[Tuple[str, str, str, str]]:
         # Use regex to split the parts correctly considering multiple spaces ()
-        match = re.match(r'^(.*?)\s+compare\s+([<>]=?|==|!=)\s*(\d+)$', part.strip())
+        match = _NUMERIC_RULE_RE.match(part.strip())
         if not match:
             self.add_error(SemanticTreeError.INVALID_COMPARE_EXPRESSION, f"Numeric rule format error: {part}", id, index)
             return None
 
         regex, operator, number = match.groups()
+        operator = _COMPARE_OPERATORS[operator]
 
         processed_regex = self._preprocess_regex(regex)
         
@@ -495,35 +562,41 @@ class SemanticTreeBuilder:
         return 'n', processed_regex, operator, number
 
     def build_tree(self, obj: Dict) -> Union[ConditionNode, None]:
-        logger.info("Building semantic tree for object: {}", obj)
-
+        # Only 'id', 'condition' and 'rules' are read, so a whole check from the
+        # validated script can be passed as-is; other keys are ignored
         try:
             id = obj.get('id', None)
+            logger.info("Building semantic tree for check ID: {}", id)
             if not isinstance(id, int):
                 self.add_error(SemanticTreeError.INVALID_ID, f"Invalid id type: {id}", id, 0)
                 return None
 
             condition = obj.get('condition', None)
-            if condition not in ['all', 'any', 'none']:
+            # One dict lookup both validates the condition and yields its shared instance
+            canonical_condition = _CONDITIONS.get(condition) if isinstance(condition, str) else None
+            if canonical_condition is None:
                 self.add_error(SemanticTreeError.INVALID_CONDITION, f"Invalid condition: {condition}", id, 0)
                 return None
+            condition = canonical_condition
 
             rules = obj.get('rules', [])
             parsed_rules = []
-            for index, rule in enumerate(rules):
-                parsed_rule = self.parse_rule(rule, id, index + 1)
+            errors_before = len(self.errors)
+            # Bind the hot-loop callables once instead of per rule
+            parse_rule = self.parse_rule
+            extend_rules = parsed_rules.extend
+            for index, rule in enumerate(rules, 1):
+                # Every parse_*_rule returns a list (one entry per target), so no type test
+                parsed_rule = parse_rule(rule, id, index)
                 if parsed_rule:
-                    if isinstance(parsed_rule, list):
-                        parsed_rules.extend(parsed_rule)
-                    else:
-                        parsed_rules.append(parsed_rule)
+                    extend_rules(parsed_rule)
                 else:
                     logger.error("Failed to parse rule: {}", rule)
 
-            # Check if there are any accumulated errors after parsing all rules
-            if any(error for error in self.errors if error['id'] == id):
+            # Check if parsing any of the rules added errors (earlier entries belong to other trees)
+            if len(self.errors) > errors_before:
                 logger.error("Errors encountered during build_tree for id: {}", id)
-                for error in self.errors:
+                for error in self.errors[errors_before:]:
                     logger.error("Error: {}", error)
                 return None
 
@@ -536,12 +609,22 @@ class SemanticTreeBuilder:
             self.add_error(SemanticTreeError.UNKNOWN_ERROR, str(e), id, 0)
             return None
 
-    def tree_to_json(self, tree: ConditionNode) -> str:
+    def tree_to_json(self, tree: ConditionNode, pretty: bool = False) -> str:
+        # Compact output for machine consumers; indentation only when a human reads it
+        if pretty:
+            return json.dumps(tree.to_dict(), indent=2)
+        if orjson is not None:
+            return orjson.dumps(tree.to_dict()).decode('utf-8')
         return json.dumps(tree.to_dict(), separators=(',', ':'))
 
     def get_errors(self) -> List[Dict[str, Union[str, int]]]:
         return self.errors
 
+    def reset(self):
+        # Forget errors of earlier scripts so a long-lived builder can be reused;
+        # rule_cache holds only successful parses, is bounded, and is kept
+        self.errors = []
+
     def print_tree(self, tree: ConditionNode):
         logger.info("Printing semantic tree:")
-        print(json.dumps(tree.to_dict(), indent=2))
+        print(self.tree_to_json(tree, pretty=True))
@@ -39,11 +39,72 @@
 """
 
 from loguru import logger
-import paramiko
 import re
 from typing import Dict, Optional, Union, Tuple, List, Any
 import json
+import hashlib
+import threading
+import select
+import time
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from functools import lru_cache
+import operator
+
+
+# paramiko (and cryptography behind it) is only loaded once a connection is actually
+# made; _import_paramiko() binds it here for every later use in this module
+paramiko = None
+
+
+def _import_paramiko():
+    global paramiko
+    if paramiko is None:
+        import paramiko as paramiko_module
+        paramiko = paramiko_module
+    return paramiko
+
+
+# OpenSSH's default MaxSessions is 10; keep one channel spare for other users of the connection
+DEFAULT_MAX_WORKERS = 9
+
+# Seconds between keepalive packets on an open transport, so pooled idle connections are
+# not dropped by NAT/firewall timeouts and a dead peer is noticed by is_active()
+SSH_KEEPALIVE_INTERVAL = 30
+
+# Bytes requested per read from a command's stdout/stderr, and the longest wait (in
+# seconds) for more output before both streams are checked again
+SSH_READ_CHUNK_SIZE = 65536
+SSH_READ_POLL_INTERVAL = 0.1
+
+# Seconds a successful command's result is reused for the same command on the same
+# connection; audit commands only read state, which does not change within a run
+COMMAND_RESULT_TTL = 60
+# Commands whose output changes from one call to the next are always run
+UNCACHEABLE_COMMAND_RE = re.compile(r"(^|[;&|(]\s*)(date|uptime|who|w|last|lastlog|ps|top|free|uuidgen|mktemp)\b|\$RANDOM|/dev/u?random")
+
+# The sudo password prompt that 'sudo -S' writes to stderr ahead of the command's own errors
+SUDO_PROMPT_RE = re.compile(r"\[sudo\] password for .+?: ?")
+
+# Comparison applied by numeric ('n:') content rules, keyed by the rule's compare operator
+COMPARE_FUNCTIONS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Number of distinct content and target patterns kept compiled
+PATTERN_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str) -> re.Pattern:
+    # Each pattern is matched against every line of every file or output it applies to;
+    # compile it once (an invalid pattern still raises re.error to the caller)
+    return re.compile(pattern)
 
 
 class ExecutionError(Enum):
@@ -73,16 +134,22 @@ class SSHManager:
         self.password = password
         self.port = port
         self.client = None
+        self.actual_os_type = None              # OS reported by the host, detected once per connection
+        self.os_type_lock = threading.Lock()    # Lets concurrent checks wait for a single detection
+        self.os_info = None                     # OS name from /etc/os-release, read once per connection
+        self.result_cache = {}                  # (command, os_type, use_sudo) -> (expires at, result)
 
     def connect(self) -> None:
         """
         Establishes an SSH connection to the specified host.
         Logs connection details and any errors encountered.
         """
+        _import_paramiko()
         try:
             self.client = paramiko.SSHClient()
             self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             self.client.connect(self.ip, port=self.port, username=self.username, password=self.password)
+            self.client.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL)
             logger.info(f"Connected to {self.ip} on port {self.port}")
         except paramiko.AuthenticationException:
             logger.error(f"Authentication failed when connecting to {self.ip}")
@@ -107,37 +174,72 @@ class SSHManager:
         ERROR_SEPARATOR = "##### Command Error #####"
 
         try:
-            logger.info(COMMAND_SEPARATOR)
-            logger.info(f"Executing command: {command}")
-            logger.info(COMMAND_SEPARATOR + "\n")
-            
             stdin, stdout, stderr = self.client.exec_command(command)
-            output = stdout.read().decode('utf-8').strip()
-            error = stderr.read().decode('utf-8').strip()
+            output, error = self._read_output(stdout.channel)
             exit_status = stdout.channel.recv_exit_status()
-            
-            logger.info(OUTPUT_SEPARATOR)
-            logger.info(f"Command output: {output if output else 'No output'}")
-            logger.info(OUTPUT_SEPARATOR + "\n")
-            
-            logger.info(ERROR_SEPARATOR)
-            logger.info(f"Command error: {error if error else 'No error'}")
-            logger.info(ERROR_SEPARATOR + "\n")
-            
-            logger.info(f"Exit status: {exit_status}")
-            
+
+            # One record per command: checks run concurrently, so separate records of
+            # different commands would interleave in the log
+            logger.info(
+                "{}\nExecuting command: {}\n{}\nCommand output: {}\n{}\nCommand error: {}\nExit status: {}",
+                COMMAND_SEPARATOR, command, OUTPUT_SEPARATOR, output if output else 'No output',
+                ERROR_SEPARATOR, error if error else 'No error', exit_status
+            )
+
             return output, error, exit_status
 
         except paramiko.SSHException as e:
-            logger.error(f"Failed to execute command: {str(e)}")
+            logger.error(f"Failed to execute command {command}: {str(e)}")
             raise Exception(f"Failed to execute command: {str(e)}")
         
+    def _read_output(self, channel) -> Tuple[str, str]:
+        """
+        Drains stdout and stderr of a command together until the remote side closes them.
+        Both streams share the channel's flow-control window, so reading one to EOF while
+        the other fills up would stall the command (and this call) on large output.
+        """
+        out_chunks = []
+        err_chunks = []
+        while True:
+            # The channel becomes readable on stdout data and on EOF; the timeout covers stderr
+            select.select([channel], [], [], SSH_READ_POLL_INTERVAL)
+            # Sampled before draining: all output sent ahead of the EOF is buffered by then.
+            # A dropped transport closes the channel without an EOF. The exit status is no
+            # signal: sshd sends it when the command exits and keeps forwarding the pipes
+            finished = channel.eof_received or channel.closed
+            while channel.recv_ready():
+                out_chunks.append(channel.recv(SSH_READ_CHUNK_SIZE))
+            while channel.recv_stderr_ready():
+                err_chunks.append(channel.recv_stderr(SSH_READ_CHUNK_SIZE))
+            if finished and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+        output = b''.join(out_chunks).decode('utf-8').strip()
+        error = b''.join(err_chunks).decode('utf-8').strip()
+        return output, error
+
     def execute_command_with_sudo(self, command: str, os_type: str, use_sudo: bool = False) -> Tuple[str, str, int]:
+        # Policies repeat the same 'test -f', 'cat' or 'stat' command across rules and checks;
+        # a successful result is reused instead of paying another round trip
+        cache_key = (command, os_type, use_sudo)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        remote_command = command
         if use_sudo and os_type:
             if os_type == "linux":
-                command = f"export LC_ALL=C && echo {self.password} | sudo -S {command}"
-        output, error, exit_status = self.execute_command(command)
-        return output.strip(), error.strip(), exit_status
+                remote_command = f"export LC_ALL=C && echo {self.password} | sudo -S {command}"
+        output, error, exit_status = self.execute_command(remote_command)
+        result = (output.strip(), error.strip(), exit_status)
+        if exit_status == 0 and not UNCACHEABLE_COMMAND_RE.search(command):
+            self.result_cache[cache_key] = (time.monotonic() + COMMAND_RESULT_TTL, result)
+        return result
+
+    def invalidate(self) -> None:
+        """
+        Forgets cached command results, so the next commands observe the host's current state.
+        """
+        self.result_cache = {}
 
     def close(self) -> None:
         """
@@ -147,8 +249,72 @@ class SSHManager:
         if self.client:
             self.client.close()
             self.client = None
+            self.actual_os_type = None
+            self.os_info = None
+            self.result_cache = {}
             logger.info(f"Disconnected from {self.ip}")
 
+    def is_active(self) -> bool:
+        """
+        Returns True while the underlying SSH transport is still usable.
+        """
+        transport = self.client.get_transport() if self.client else None
+        return transport is not None and transport.is_active()
+
+
+class SSHConnectionPool:
+    def __init__(self):
+        # Idle, already authenticated managers keyed by (ip, port, username, password digest)
+        self._idle: Dict[Tuple[str, int, str, bytes], List[SSHManager]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ip: str, port: int, username: str, password: str) -> Tuple[str, int, str, bytes]:
+        # A connection is only handed to callers presenting the password it was opened
+        # with; otherwise a wrong password would get an authenticated session (and sudo)
+        password_digest = hashlib.blake2b(password.encode('utf-8'), digest_size=16).digest()
+        return (ip, port, username, password_digest)
+
+    def acquire(self, ip: str, username: str, password: str, port: int = 22) -> SSHManager:
+        """
+        Returns a connected SSHManager for the host, reusing an idle one when possible.
+        Commands run as separate channels on the pooled transport, so no new handshake is paid.
+        """
+        key = self._key(ip, port, username, password)
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                ssh_manager = idle.pop()
+                if ssh_manager.is_active():
+                    logger.debug(f"Reusing pooled SSH connection to {ip}")
+                    return ssh_manager
+                ssh_manager.close()
+
+        ssh_manager = SSHManager(ip, username, password, port)
+        ssh_manager.connect()
+        return ssh_manager
+
+    def release(self, ssh_manager: SSHManager) -> None:
+        """
+        Returns a manager to the pool; dead connections are closed instead.
+        """
+        if not ssh_manager.is_active():
+            ssh_manager.close()
+            return
+        key = self._key(ssh_manager.ip, ssh_manager.port, ssh_manager.username, ssh_manager.password)
+        with self._lock:
+            self._idle.setdefault(key, []).append(ssh_manager)
+
+    def close_all(self) -> None:
+        """
+        Closes every idle connection held by the pool.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for ssh_managers in idle.values():
+            for ssh_manager in ssh_managers:
+                ssh_manager.close()
+
 
 class OSCommandBuilder:
     def __init__(self, os_type: str):
@@ -217,6 +383,17 @@ class OSCommandBuilder:
             raise ValueError(f"Unsupported OS type: {self.os_type}")
 
 
+# OSCommandBuilder only holds the OS type, so one instance per OS serves every node and rule
+COMMAND_BUILDERS: Dict[str, OSCommandBuilder] = {}
+
+
+def get_command_builder(os_type: str) -> OSCommandBuilder:
+    command_builder = COMMAND_BUILDERS.get(os_type)
+    if command_builder is None:
+        command_builder = COMMAND_BUILDERS.setdefault(os_type, OSCommandBuilder(os_type))
+    return command_builder
+
+
 class ExecutionResult:
     def __init__(self, success: bool, output: Optional[str] = None, error: Optional[str] = None):
         self.success = success
@@ -238,7 +415,7 @@ class ExecutionNodeExecutor:
         self.sub_target = sub_target
         self.target_pattern = target_pattern
         self.os_type = os_type
-        self.command_builder = OSCommandBuilder(os_type)
+        self.command_builder = get_command_builder(os_type)
 
     def execute(self, ssh_manager: SSHManager) -> ExecutionResult:
         try:
@@ -247,27 +424,28 @@ class ExecutionNodeExecutor:
             if self.os_type != actual_os_type:
                 return ExecutionResult(success=False, error=ExecutionError.MISMATCH_OS_TYPE.value[1])
 
-            if self.node_type == 'd':
-                return self.check_directory_existence(ssh_manager)
-            elif self.node_type == 'f':
-                if self.target_pattern:
-                    return self.list_files_with_pattern(ssh_manager)
-                return self.check_file_existence(ssh_manager)
-            elif self.node_type == 'c':
-                return self.run_command(ssh_manager)
-            elif self.node_type == 'p':
-                return self.check_process_existence(ssh_manager)
-            elif self.node_type == 'r':
-                return self.check_registry_key(ssh_manager)
-            else:
+            handler = self.NODE_HANDLERS.get(self.node_type)
+            if handler is None:
                 logger.error(f"Invalid node type: {self.node_type}")
                 return ExecutionResult(success=False, error=ExecutionError.INVALID_NODE_TYPE.value[1])
+            return handler(self, ssh_manager)
 
         except Exception as e:
             logger.exception(f"Command execution failed: {str(e)}")
             return ExecutionResult(success=False, error=f"{ExecutionError.COMMAND_FAILED.value[1]}: {str(e)}")
     
     def determine_actual_os_type(self, ssh_manager: SSHManager) -> str:
+        # The host's OS cannot change while connected, so uname runs once per connection
+        # rather than before every node; a failed detection is retried by the next node
+        actual_os_type = ssh_manager.actual_os_type
+        if actual_os_type is None:
+            with ssh_manager.os_type_lock:
+                if ssh_manager.actual_os_type is None:
+                    ssh_manager.actual_os_type = self._detect_os_type(ssh_manager)
+                actual_os_type = ssh_manager.actual_os_type
+        return actual_os_type
+
+    def _detect_os_type(self, ssh_manager: SSHManager) -> str:
         try:
             command = 'uname'
             output, error, exit_status = ssh_manager.execute_command_with_sudo(command, "", use_sudo=True)
@@ -297,6 +475,12 @@ class ExecutionNodeExecutor:
             logger.exception(f"Directory existence check failed: {str(e)}")
             return ExecutionResult(success=False, error=f"{ExecutionError.SSH_EXECUTION_FAILED.value[1]}: {str(e)}")
 
+    def check_file(self, ssh_manager: SSHManager) -> ExecutionResult:
+        # A file node with a target pattern lists the matching files; otherwise it is an existence check
+        if self.target_pattern:
+            return self.list_files_with_pattern(ssh_manager)
+        return self.check_file_existence(ssh_manager)
+
     def check_file_existence(self, ssh_manager: SSHManager) -> ExecutionResult:
         if self.sub_target or self.target_pattern:
             logger.error("Invalid configuration: sub_target or target_pattern provided for file check")
@@ -343,7 +527,7 @@ class ExecutionNodeExecutor:
 
     def _filter_files_with_pattern(self, file_list: str, pattern: str) -> list:
         try:
-            regex = re.compile(pattern)
+            regex = compile_pattern(pattern)
             return [file.strip() for file in file_list.split("\n") if file.strip() and regex.search(file.strip())]
         except re.error as e:
             logger.error(f"Invalid regex pattern: {str(e)}")
@@ -362,7 +546,7 @@ class ExecutionNodeExecutor:
             output = output.strip() if output else ""
             error = error.strip() if error else ""
 
-            error = re.sub(r"\[sudo\] password for .+?: ?", "", error)
+            error = SUDO_PROMPT_RE.sub("", error)
 
             if output and error:
                 combined_output = f"{output}\n{error}"
@@ -411,6 +595,15 @@ class ExecutionNodeExecutor:
         except Exception as e:
             logger.exception(f"Registry key check failed: {str(e)}")
             return ExecutionResult(success=False, error=f"{ExecutionError.SSH_EXECUTION_FAILED.value[1]}: {str(e)}")
+
+    # Node handler keyed by node type, looked up once per node instead of an if/elif chain
+    NODE_HANDLERS = {
+        'd': check_directory_existence,
+        'f': check_file,
+        'c': run_command,
+        'p': check_process_existence,
+        'r': check_registry_key,
+    }
         
 
 class ContentCheckResult:
@@ -481,18 +674,15 @@ class ContentRuleChecker:
                     logger.error("No files matched the pattern")
                     return ContentCheckResult(success=False, error="No files matched the pattern.")
 
-                results = []
+                # One passing file is enough, so the remaining files are not read
                 for file_path in content:
                     logger.debug("Reading and checking file: {}", file_path)
                     result = self.read_and_check_file(file_path)
-                    if not result.success:
-                        logger.debug("Failed with file: {}. Error: {}", file_path, result.error)
-                        results.append(False)
-                    else:
-                        results.append(result.success)
+                    if result.success:
+                        return ContentCheckResult(success=True)
+                    logger.debug("Failed with file: {}. Error: {}", file_path, result.error)
 
-                final_result = any(results)
-                return ContentCheckResult(success=final_result)
+                return ContentCheckResult(success=False)
 
             else:
                 logger.error("Invalid file rule")
@@ -534,24 +724,35 @@ class ContentRuleChecker:
 
     def _check_lines(self, lines: List[str]) -> ContentCheckResult:
         match = False
+        rules = self.content_rules
     
-        for line in lines:
-            line_match = True
+        if lines and len(rules) == 1 and rules[0].get('content_operator') == 'r':
+            # The usual single regex rule: search all lines in one C-level pass instead
+            # of a per-line Python loop (same result: does any line satisfy the rule)
+            rule = rules[0]
+            pattern = compile_pattern(rule.get('value'))
+            if rule.get('negation', False):
+                match = not all(map(pattern.search, lines))
+            else:
+                match = any(map(pattern.search, lines))
+        else:
+            for line in lines:
+                line_match = True
     
-            for rule in self.content_rules:
-                rule_match = self._does_line_match_rule(line, rule)
+                for rule in rules:
+                    rule_match = self._does_line_match_rule(line, rule)
     
-                if rule.get('negation', False):
-                    rule_match = not rule_match
+                    if rule.get('negation', False):
+                        rule_match = not rule_match
     
-                if not rule_match:
-                    line_match = False
-                    break
+                    if not rule_match:
+                        line_match = False
+                        break
     
-            if line_match:
-                match = True
-                logger.debug("Line matched all rules: {}", line)
-                break
+                if line_match:
+                    match = True
+                    logger.debug("Line matched all rules: {}", line)
+                    break
     
         if self.rule_negation:
             match = not match
@@ -564,7 +765,7 @@ class ContentRuleChecker:
         value = rule.get('value')
     
         if content_operator == 'r':  # Regex match
-            match = bool(re.search(value, line))
+            match = bool(compile_pattern(value).search(line))
             logger.debug("Checked line: {}, Regex pattern: {}, Match result: {}", line, value, match)
         elif content_operator == 'n':  # Numeric comparison
             match = self.numeric_compare(line, value, rule.get('compare_operator'), rule.get('compare_value'))
@@ -581,7 +782,7 @@ class ContentRuleChecker:
     def numeric_compare(self, content: str, value: str, compare_operator: str, compare_value_str: str) -> bool:
         try:
             logger.debug("Performing numeric comparison on content: {}", content)
-            match = re.search(value, content)
+            match = compile_pattern(value).search(content)
             if not match:
                 logger.debug("No numeric match found for value: {}", value)
                 return False
@@ -590,21 +791,11 @@ class ContentRuleChecker:
             compare_value = int(compare_value_str)
             logger.debug("Extracted number: {}, Compare value: {}", number, compare_value)
 
-            if compare_operator == '>':
-                return number > compare_value
-            elif compare_operator == '>=':
-                return number >= compare_value
-            elif compare_operator == '<':
-                return number < compare_value
-            elif compare_operator == '<=':
-                return number <= compare_value
-            elif compare_operator == '==':
-                return number == compare_value
-            elif compare_operator == '!=':
-                return number != compare_value
-            else:
+            compare = COMPARE_FUNCTIONS.get(compare_operator)
+            if compare is None:
                 logger.error("Invalid compare operator: {}", compare_operator)
                 return False
+            return compare(number, compare_value)
         except Exception as e:
             logger.exception("Error in numeric comparison: {}", str(e))
             raise ValueError(f"{ExecutionError.INVALID_COMPARE_EXPRESSION.value[1]}: {str(e)}")
@@ -643,18 +834,35 @@ class SemanticTreeExecutionResult:
 
 
 class SemanticTreeExecutor:
-    def __init__(self, ip: str, username: str, password: str, port: int = 22):
+    def __init__(self, ip: str, username: str, password: str, port: int = 22, ssh_pool: Optional[SSHConnectionPool] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
         self.ssh_manager = SSHManager(ip, username, password, port)
+        self.ssh_pool = ssh_pool        # When set, the connection is borrowed from and returned to this pool
+        self.max_workers = max_workers  # Upper bound on checks running at once over the connection
 
     def connect(self) -> bool:
         try:
-            self.ssh_manager.connect()
+            if self.ssh_pool is not None:
+                self.ssh_manager = self.ssh_pool.acquire(
+                    self.ssh_manager.ip, self.ssh_manager.username, self.ssh_manager.password, self.ssh_manager.port
+                )
+            else:
+                self.ssh_manager.connect()
+            # Results are shared between the nodes of one run only; a pooled connection
+            # may still hold those of an earlier run
+            self.ssh_manager.invalidate()
             logger.info(f"Connected to {self.ssh_manager.ip}")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to {self.ssh_manager.ip}: {str(e)}")
             return False
 
+    def disconnect(self) -> None:
+        if self.ssh_pool is not None:
+            self.ssh_pool.release(self.ssh_manager)
+        else:
+            self.ssh_manager.close()
+
     def execute_tree(self, semantic_tree: Dict) -> SemanticTreeExecutionResult:
         # Attempt to connect to the SSH server
         if not self.connect():
@@ -667,49 +875,71 @@ class SemanticTreeExecutor:
 
         successful_check_count = 0
 
-        for check in checks:
-            check_id = check['id']
-            condition = check['condition']
-
-            logger.info("##########################################################")
-            logger.info(f"##### Executing check ID: {check_id} with condition: {condition} #####")
-            logger.info("##########################################################")
-
-            rule_results = self._execute_rules(check['rules'], os_type)
-            if isinstance(rule_results, SemanticTreeExecutionResult):
-                # If an error occurred during rule execution, return it immediately
-                self.ssh_manager.close()
-                return rule_results
-
-            # Print all rule results for this check ID
-            logger.debug(f"Rule results for check ID {check_id}: {rule_results}")
-
-            # Determine the final check result based on the condition
-            check_pass = self._evaluate_condition(condition, rule_results)
-            if check_pass is None:
-                self.ssh_manager.close()
-                logger.error(f"Invalid condition specified at check ID {check_id}")
-                return SemanticTreeExecutionResult(
-                    success=False,
-                    error=f"Invalid condition specified at check ID {check_id}"
-                )
+        # Checks are independent, so run them concurrently as separate channels on the
+        # one SSH transport; stay below sshd's MaxSessions so channels are not refused
+        max_workers = max(1, min(self.max_workers, len(checks)))
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [pool.submit(self._execute_check, check, os_type) for check in checks]
 
-            if check_pass:
-                successful_check_count += 1
+            # Consume in script order so the first failing check is still the one reported
+            for check, future in zip(checks, futures):
+                check_result = future.result()
+                if isinstance(check_result, SemanticTreeExecutionResult):
+                    # If an error occurred during check execution, return it immediately
+                    return check_result
 
-            # Store the check result with rule details and condition
-            results[check_id] = {
-                'result': 'pass' if check_pass else 'fail',
-                'condition': condition,
-                'rule_results': rule_results
-            }
+                if check_result['result'] == 'pass':
+                    successful_check_count += 1
 
-            logger.info(f"Check ID: {check_id} result: {results[check_id]['result']}")  # Log check result
+                # Store the check result with rule details and condition
+                results[check['id']] = check_result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            # Close (or return to the pool) the SSH connection, also when a check raised
+            self.disconnect()
 
-        # Close the SSH connection after all checks
-        self.ssh_manager.close()
         return SemanticTreeExecutionResult(success=True, results=results, executed_count=successful_check_count)
 
+    def _execute_check(self, check: Dict, os_type: str) -> Union[Dict[str, Any], SemanticTreeExecutionResult]:
+        # Checks run concurrently; every record logged for this check carries its id
+        # (extra['check_id']), so a log format can tell interleaved checks apart
+        with logger.contextualize(check_id=check['id']):
+            return self._run_check(check, os_type)
+
+    def _run_check(self, check: Dict, os_type: str) -> Union[Dict[str, Any], SemanticTreeExecutionResult]:
+        check_id = check['id']
+        condition = check['condition']
+
+        logger.info("##########################################################")
+        logger.info(f"##### Executing check ID: {check_id} with condition: {condition} #####")
+        logger.info("##########################################################")
+
+        rule_results = self._execute_rules(check['rules'], os_type)
+        if isinstance(rule_results, SemanticTreeExecutionResult):
+            return rule_results
+
+        # Print all rule results for this check ID
+        logger.debug(f"Rule results for check ID {check_id}: {rule_results}")
+
+        # Determine the final check result based on the condition
+        check_pass = self._evaluate_condition(condition, rule_results)
+        if check_pass is None:
+            logger.error(f"Invalid condition specified at check ID {check_id}")
+            return SemanticTreeExecutionResult(
+                success=False,
+                error=f"Invalid condition specified at check ID {check_id}"
+            )
+
+        check_result = {
+            'result': 'pass' if check_pass else 'fail',
+            'condition': condition,
+            'rule_results': rule_results
+        }
+
+        logger.info(f"Check ID: {check_id} result: {check_result['result']}")  # Log check result
+        return check_result
+
     def _execute_rules(self, rules: List[Dict], os_type: str) -> Union[List[bool], SemanticTreeExecutionResult]:
         rule_results = []
 
@@ -792,7 +1022,7 @@ class SemanticTreeExecutor:
                 node_type=rule['execution_node']['type'],
                 content_rules=rule.get('content_rules', []),
                 ssh_manager=self.ssh_manager,
-                command_builder=OSCommandBuilder(os_type),
+                command_builder=get_command_builder(os_type),
                 os_type=os_type,
                 rule_negation=rule_negation
             )
@@ -0,0 +1,108 @@
+"""
+===============================================================================
+    Program Name: Report Writer Unit Tests
+    Description:  This script contains unit tests for the YAML report written
+                  by main.py. Writing the report one check at a time must give
+                  the same text as dumping the whole report in one call. The
+                  OS name shown in the report is read once per connection.
+
+    Usage:        pytest test_main_report.py
+===============================================================================
+"""
+
+import pytest
+import yaml
+import io
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from main import (
+    CustomDumper,
+    REPORT_CHECK_FIELDS,
+    get_flow_sequence,
+    get_os_info,
+    write_report
+)
+from semantic_tree_executor import SSHManager
+
+AUDIT_INFO = {
+    'detection_id': 'b3c1e0d2',
+    'os_info': 'Ubuntu 22.04.4 LTS',
+    'total_checks': 3,
+    'pass_percentage': 66.67,
+    'ai_enabled': False,
+    'note: with colon': 'multi\nline'
+}
+
+
+def dump_report(audit_info, ordered_checks):
+    # The whole report in a single yaml.dump call, as main() wrote it before
+    return yaml.dump(
+        {'audit_info': audit_info, 'checks': ordered_checks},
+        Dumper=CustomDumper,
+        default_flow_style=False,
+        allow_unicode=True,
+        sort_keys=False,
+        width=4096
+    )
+
+
+def load_report_checks():
+    input_data_path = os.path.join(os.path.dirname(__file__), 'data_fixtures/cis_ubuntu22-04.yml')
+    with open(input_data_path, 'r') as file:
+        checks = yaml.safe_load(file)['checks']
+
+    ordered_checks = []
+    for check in checks:
+        check = dict(check, result='pass')
+        check['compliance'] = [
+            {key: get_flow_sequence(value)} for item in check.get('compliance', []) for key, value in item.items()
+        ]
+        check['rules'] = [{'pass': rule} for rule in check['rules']]
+        ordered_checks.append({field: check.get(field) for field in REPORT_CHECK_FIELDS})
+    return ordered_checks
+
+
+@pytest.mark.parametrize("ordered_checks", [load_report_checks(), []], ids=['cis_ubuntu22-04', 'no_checks'])
+def test_write_report_matches_single_dump(ordered_checks):
+    outfile = io.StringIO()
+    write_report(outfile, AUDIT_INFO, ordered_checks)
+
+    assert outfile.getvalue() == dump_report(AUDIT_INFO, ordered_checks)
+
+
+class OneConnectionPool:
+    # Hands out a single manager whose host answers 'cat /etc/os-release'
+    def __init__(self, os_release):
+        self.ssh_manager = SSHManager('10.0.0.1', 'audit', 'secret')
+        self.os_release = os_release
+        self.commands = []
+        self.ssh_manager.execute_command = self.execute_command
+
+    def execute_command(self, command):
+        self.commands.append(command)
+        return self.os_release, '', 0
+
+    def acquire(self, ip, username, password, port=22):
+        return self.ssh_manager
+
+    def release(self, ssh_manager):
+        pass
+
+
+def test_get_os_info_is_read_once_per_connection():
+    ssh_details = {'ip': '10.0.0.1', 'username': 'audit', 'password': 'secret', 'port': 22}
+    pool = OneConnectionPool('NAME="Ubuntu"\nPRETTY_NAME="Ubuntu 22.04.4 LTS"\n')
+
+    assert get_os_info(ssh_details, pool) == 'Ubuntu 22.04.4 LTS'
+    assert get_os_info(ssh_details, pool) == 'Ubuntu 22.04.4 LTS'
+    assert len(pool.commands) == 1
+
+    # A new connection (e.g. after a reconnect) reads the name again
+    pool.ssh_manager.os_info = None
+    pool.os_release = 'NAME="Debian GNU/Linux"\n'
+    assert get_os_info(ssh_details, pool) == 'Debian GNU/Linux'
+    assert len(pool.commands) == 2
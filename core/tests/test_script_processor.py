@@ -0,0 +1,102 @@
+"""
+===============================================================================
+    Program Name: Script Processor Unit Tests
+    Description:  This script contains unit tests for the Script Processor
+                  entry points. Scripts handed over already parsed
+                  (process_data, process_trusted) must give the same result
+                  as the YAML text passed to process_yml.
+
+    Usage:        pytest test_script_processor.py
+===============================================================================
+"""
+
+import pytest
+import yaml
+import os
+import sys
+
+# Add the core directory to the Python path (the processor uses package-relative imports)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.script_processor import ScriptProcessor
+from src.script_validator import ScriptValidator, ValidationError
+
+test_cases_path = os.path.join(os.path.dirname(__file__), 'test_data_mappings.yml')
+with open(test_cases_path, 'r') as file:
+    test_cases = yaml.safe_load(file)
+
+
+@pytest.fixture(scope='module')
+def script_processor():
+    return ScriptProcessor()
+
+
+def load_file_content(case):
+    input_data_path = os.path.join(os.path.dirname(__file__), case['input'])
+    with open(input_data_path, 'r') as file:
+        return file.read()
+
+
+@pytest.mark.parametrize("case", test_cases['test_data_mappings'])
+def test_process_data_matches_process_yml(script_processor, case):
+    file_content = load_file_content(case)
+
+    expected = script_processor.process_yml(file_content)
+    assert script_processor.process_data(yaml.safe_load(file_content)) == expected
+
+
+# process_trusted is only meant for scripts that pass validation
+@pytest.mark.parametrize("input_file", ['data_fixtures/cis_ubuntu22-04.yml', 'data_fixtures/sec_audit_rules.yml'])
+def test_process_trusted_matches_process_data(script_processor, input_file):
+    script_data = yaml.safe_load(load_file_content({'input': input_file}))
+
+    expected = script_processor.process_data(script_data, serialize=False)
+    assert 'checks' in expected
+    assert script_processor.process_trusted(script_data, serialize=False) == expected
+
+
+def test_process_data_reports_validation_errors(script_processor):
+    result = script_processor.process_data({'checks': []})
+
+    assert result['status'] == 'error'
+    assert result['error_code'] == 'P001'
+    assert result['details'] == [{"code": "V002", "message": "'checks' section is empty or missing"}]
+
+
+def test_validate_data_starts_each_script_with_no_errors():
+    validator = ScriptValidator()
+    with pytest.raises(ValidationError) as excinfo:
+        validator.validate_data({'checks': []})
+    first_errors = excinfo.value.errors
+
+    script_data = {'checks': [{
+        'id': 1, 'title': 't', 'description': 'd', 'rationale': 'r',
+        'remediation': 'm', 'condition': 'all', 'rules': ['f:/etc/passwd']
+    }]}
+    assert validator.validate_data(script_data) is script_data
+    assert validator.get_errors() == []
+    # The earlier exception keeps its own error list
+    assert first_errors == [{"code": "V002", "message": "'checks' section is empty or missing"}]
+
+
+def test_process_yml_tree_edits_do_not_reach_the_cache():
+    script_processor = ScriptProcessor()
+    file_content = load_file_content({'input': 'data_fixtures/cis_ubuntu22-04.yml'})
+    expected = script_processor.process_yml(file_content)
+
+    first_tree = script_processor.process_yml(file_content, serialize=False)
+    first_tree['checks'][0]['condition'] = 'most'
+    first_tree['checks'].pop()
+    first_tree['results'] = {}
+
+    assert script_processor.process_yml(file_content) == expected
+
+
+def test_validate_checks_takes_the_checks_list():
+    validator = ScriptValidator()
+    validator.validate_checks([{'id': 7, 'title': 't', 'description': 'd', 'rationale': 'r',
+                                'remediation': 'm', 'condition': 'all', 'rules': []}])
+
+    assert validator.get_errors() == [
+        {"code": "V005", "message": "Field cannot be empty in script", "details": ('rules', 7)}
+    ]
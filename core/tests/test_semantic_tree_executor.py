@@ -0,0 +1,267 @@
+"""
+===============================================================================
+    Program Name: Semantic Tree Executor Unit Tests
+    Description:  This script contains unit tests for the Semantic Tree
+                  Executor. No SSH server is needed: connections and command
+                  output are replaced by small stand-ins for the paramiko
+                  objects the executor talks to.
+
+    Usage:        pytest test_semantic_tree_executor.py
+===============================================================================
+"""
+
+import pytest
+import os
+import sys
+import time
+import threading
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import semantic_tree_executor
+from semantic_tree_builder import SemanticTreeBuilder
+from semantic_tree_executor import (
+    SSHManager,
+    SSHConnectionPool,
+    SemanticTreeExecutor
+)
+
+
+@pytest.fixture
+def offline_ssh(monkeypatch):
+    # connect() marks the manager as connected instead of opening a session
+    def connect(ssh_manager):
+        ssh_manager.client = object()
+
+    monkeypatch.setattr(SSHManager, 'connect', connect)
+    monkeypatch.setattr(SSHManager, 'is_active', lambda ssh_manager: ssh_manager.client is not None)
+    monkeypatch.setattr(SSHManager, 'close', lambda ssh_manager: setattr(ssh_manager, 'client', None))
+
+
+def test_pool_reuses_connection_for_same_credentials(offline_ssh):
+    pool = SSHConnectionPool()
+    ssh_manager = pool.acquire('10.0.0.1', 'audit', 'secret')
+    pool.release(ssh_manager)
+
+    assert pool.acquire('10.0.0.1', 'audit', 'secret') is ssh_manager
+
+
+def test_pool_does_not_share_connection_across_passwords(offline_ssh):
+    pool = SSHConnectionPool()
+    ssh_manager = pool.acquire('10.0.0.1', 'audit', 'secret')
+    pool.release(ssh_manager)
+
+    other_manager = pool.acquire('10.0.0.1', 'audit', 'wrong')
+    assert other_manager is not ssh_manager
+    assert other_manager.password == 'wrong'
+    # The connection opened with the right password is still waiting in the pool
+    assert pool.acquire('10.0.0.1', 'audit', 'secret') is ssh_manager
+
+
+class ClosedChannel:
+    # A paramiko channel whose transport dropped: closed, output left in its buffers,
+    # but no EOF and no exit status ever arrive
+    def __init__(self, stdout_chunks, stderr_chunks):
+        self.stdout_chunks = list(stdout_chunks)
+        self.stderr_chunks = list(stderr_chunks)
+        self.eof_received = False
+        self.closed = True
+        # A closed paramiko channel stays readable, so select() returns at once
+        self._read_fd, self._write_fd = os.pipe()
+        os.write(self._write_fd, b'x')
+
+    def fileno(self):
+        return self._read_fd
+
+    def recv_ready(self):
+        return bool(self.stdout_chunks)
+
+    def recv(self, nbytes):
+        return self.stdout_chunks.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr_chunks)
+
+    def recv_stderr(self, nbytes):
+        return self.stderr_chunks.pop(0)
+
+    def exit_status_ready(self):
+        return False
+
+    def release(self):
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+
+def test_read_output_stops_on_channel_closed_without_eof():
+    channel = ClosedChannel([b'partial ', b'output\n'], [b'error\n'])
+    outputs = []
+    reader = threading.Thread(target=lambda: outputs.append(SSHManager('10.0.0.1', 'audit', 'secret')._read_output(channel)), daemon=True)
+    reader.start()
+    reader.join(timeout=5)
+    channel.release()
+
+    assert not reader.is_alive(), "_read_output kept polling a closed channel"
+    assert outputs == [('partial output', 'error')]
+
+
+class LateOutputChannel(ClosedChannel):
+    # The exit status is in at once, but the last chunk and the EOF follow later,
+    # as when sshd is still forwarding the pipes of a command that already exited
+    def __init__(self, stdout_chunks, late_chunk, delay):
+        super().__init__(stdout_chunks, [])
+        self.closed = False
+        self.late_chunk = late_chunk
+        self.arrives_at = time.monotonic() + delay
+
+    def _deliver(self):
+        if self.late_chunk is not None and time.monotonic() >= self.arrives_at:
+            self.stdout_chunks.append(self.late_chunk)
+            self.late_chunk = None
+            self.eof_received = True
+
+    def recv_ready(self):
+        self._deliver()
+        return super().recv_ready()
+
+    def exit_status_ready(self):
+        return True
+
+
+def test_read_output_waits_for_eof_after_exit_status():
+    channel = LateOutputChannel([b'head\n'], b'tail\n', delay=0.05)
+    try:
+        output = SSHManager('10.0.0.1', 'audit', 'secret')._read_output(channel)
+    finally:
+        channel.release()
+
+    assert output == ('head\ntail', '')
+
+
+def fake_execute_command(ssh_manager, command):
+    # 'echo <n>' prints n; higher numbers answer sooner, so checks finish out of order
+    if command == 'uname':
+        return 'Linux', '', 0
+    value = command.split()[-1]
+    time.sleep(0.01 * (10 - int(value)))
+    return value, '', 0
+
+
+@pytest.fixture
+def fake_host(offline_ssh, monkeypatch):
+    monkeypatch.setattr(SSHManager, 'execute_command', fake_execute_command)
+
+
+def build_semantic_tree(checks):
+    builder = SemanticTreeBuilder()
+    return {'checks': [builder.build_tree(check).to_dict() for check in checks]}
+
+
+def test_execute_tree_keeps_script_order(fake_host):
+    # Every even check expects the value its command prints, every odd one another value
+    checks = [
+        {'id': check_id, 'condition': 'all', 'rules': [f"c:echo {check_id} -> r:^{check_id if check_id % 2 == 0 else 'x'}$"]}
+        for check_id in range(1, 9)
+    ]
+    executor = SemanticTreeExecutor('10.0.0.1', 'audit', 'secret', max_workers=4)
+    result = executor.execute_tree(build_semantic_tree(checks))
+
+    assert result.success
+    assert list(result.results) == list(range(1, 9))
+    assert [check_result['result'] for check_result in result.results.values()] == ['fail', 'pass'] * 4
+    assert result.executed_count == 4
+
+
+def test_execute_tree_reports_first_failing_check(fake_host):
+    semantic_tree = build_semantic_tree([
+        {'id': check_id, 'condition': 'all', 'rules': [f"c:echo {check_id} -> r:^{check_id}$"]}
+        for check_id in range(1, 6)
+    ])
+    # Checks 2 and 4 carry a condition the executor rejects; check 4 fails first in time
+    semantic_tree['checks'][1]['condition'] = 'most'
+    semantic_tree['checks'][3]['condition'] = 'most'
+    executor = SemanticTreeExecutor('10.0.0.1', 'audit', 'secret', max_workers=4)
+    result = executor.execute_tree(semantic_tree)
+
+    assert not result.success
+    assert result.error == "Invalid condition specified at check ID 2"
+
+
+def test_execute_tree_returns_connection_when_a_check_raises(fake_host, monkeypatch):
+    def evaluate_condition(executor, condition, rule_results):
+        raise RuntimeError("unexpected failure")
+
+    monkeypatch.setattr(SemanticTreeExecutor, '_evaluate_condition', evaluate_condition)
+    pool = SSHConnectionPool()
+    executor = SemanticTreeExecutor('10.0.0.1', 'audit', 'secret', ssh_pool=pool)
+    with pytest.raises(RuntimeError):
+        executor.execute_tree(build_semantic_tree([{'id': 1, 'condition': 'all', 'rules': ['c:echo 1 -> r:^1$']}]))
+
+    # The connection went back to the pool instead of leaking
+    assert pool.acquire('10.0.0.1', 'audit', 'secret') is executor.ssh_manager
+
+
+@pytest.fixture
+def counting_ssh_manager(offline_ssh, monkeypatch):
+    # Every command prints how many commands the host has run so far
+    calls = []
+
+    def execute_command(ssh_manager, command):
+        calls.append(command)
+        return str(len(calls)), '', 1 if command.startswith('false') else 0
+
+    monkeypatch.setattr(SSHManager, 'execute_command', execute_command)
+    ssh_manager = SSHManager('10.0.0.1', 'audit', 'secret')
+    ssh_manager.connect()
+    return ssh_manager, calls
+
+
+def test_command_results_are_reused(counting_ssh_manager):
+    ssh_manager, calls = counting_ssh_manager
+
+    assert ssh_manager.execute_command_with_sudo('cat /etc/passwd', 'linux') == ('1', '', 0)
+    assert ssh_manager.execute_command_with_sudo('cat /etc/passwd', 'linux') == ('1', '', 0)
+    # The same command under sudo is a different result
+    assert ssh_manager.execute_command_with_sudo('cat /etc/passwd', 'linux', use_sudo=True) == ('2', '', 0)
+    assert len(calls) == 2
+    assert 'secret' in calls[1]
+
+
+def test_failed_and_volatile_commands_are_not_reused(counting_ssh_manager):
+    ssh_manager, calls = counting_ssh_manager
+
+    for command in ('false /etc/shadow', 'date +%s', 'cat /etc/hosts; uptime', 'echo $RANDOM'):
+        ssh_manager.execute_command_with_sudo(command, 'linux')
+        ssh_manager.execute_command_with_sudo(command, 'linux')
+    assert len(calls) == 8
+
+
+def test_command_results_expire(counting_ssh_manager, monkeypatch):
+    ssh_manager, calls = counting_ssh_manager
+    now = [1000.0]
+    monkeypatch.setattr(semantic_tree_executor.time, 'monotonic', lambda: now[0])
+
+    ssh_manager.execute_command_with_sudo('cat /etc/passwd', 'linux')
+    now[0] += semantic_tree_executor.COMMAND_RESULT_TTL - 1
+    ssh_manager.execute_command_with_sudo('cat /etc/passwd', 'linux')
+    assert len(calls) == 1
+
+    now[0] += 1
+    assert ssh_manager.execute_command_with_sudo('cat /etc/passwd', 'linux') == ('2', '', 0)
+
+
+def test_each_tree_execution_starts_with_fresh_results(fake_host):
+    semantic_tree = build_semantic_tree([{'id': 1, 'condition': 'all', 'rules': ['c:echo 9 -> r:^9$']}])
+    pool = SSHConnectionPool()
+    executor = SemanticTreeExecutor('10.0.0.1', 'audit', 'secret', ssh_pool=pool)
+    assert executor.execute_tree(semantic_tree).success
+
+    # The pooled connection comes back holding the first run's results
+    ssh_manager = pool.acquire('10.0.0.1', 'audit', 'secret')
+    assert ssh_manager.result_cache
+    pool.release(ssh_manager)
+    executor = SemanticTreeExecutor('10.0.0.1', 'audit', 'secret', ssh_pool=pool)
+    assert executor.connect()
+    assert executor.ssh_manager is ssh_manager
+    assert not ssh_manager.result_cache
@@ -0,0 +1,61 @@
+"""
+===============================================================================
+    Program Name: YAML Helper Unit Tests
+    Description:  This script contains unit tests for the YAML helper used by
+                  the rule statistics scripts. The event-stream extractor must
+                  return the same check ids and rules as a full yaml.safe_load
+                  of the policy files.
+
+    Usage:        pytest test_yaml_helper.py
+===============================================================================
+"""
+
+import pytest
+import yaml
+import os
+import sys
+
+# Add the calculations directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../calculations')))
+
+from yaml_helper import extract_checks, count_rule_types
+
+test_cases_path = os.path.join(os.path.dirname(__file__), 'test_data_mappings.yml')
+with open(test_cases_path, 'r') as file:
+    test_cases = yaml.safe_load(file)
+
+
+@pytest.mark.parametrize("case", test_cases['test_data_mappings'])
+def test_extract_checks_matches_safe_load(case):
+    input_data_path = os.path.join(os.path.dirname(__file__), case['input'])
+    with open(input_data_path, 'r') as file:
+        input_data = yaml.safe_load(file)
+    with open(input_data_path, 'rb') as file:
+        extracted = extract_checks(file)
+
+    # The extractor keeps scalars as the strings libyaml reports
+    expected = [
+        {key: (str(value) if key == 'id' else value) for key, value in check.items() if key in ('id', 'rules')}
+        for check in input_data['checks']
+    ]
+    assert extracted['checks'] == expected
+
+
+def test_extract_checks_without_checks():
+    assert extract_checks("policy:\n  id: 1\n") == {'checks': None}
+
+
+def test_count_rule_types():
+    rules = [
+        'f:/etc/passwd',
+        'not f:/etc/shadow',
+        'c:stat /etc/passwd -> r:Access',
+        'r:HKLM\\SOFTWARE',
+        'p:sshd',
+        'd:/var/log',
+        'f:/etc/group',
+        'x:unknown',
+        'f',
+    ]
+    assert count_rule_types(rules) == {'f': 2, 'c': 1, 'r': 1, 'p': 1, 'd': 1}
+    assert count_rule_types([]) == {}